@@ -0,0 +1,15 @@
+from tetris_ai import TetrisBot
+from tetris_engine import Tetris
+
+
+def test_plan_async_matches_plan_moves_and_leaves_game_alone():
+    game = Tetris(seed=6)
+    bot = TetrisBot(lookahead=1)
+    try:
+        expected = bot.plan_moves(game)
+        future = bot.plan_async(game)
+        # The loop keeps ticking the real game while the plan is computed
+        game.tick(5)
+        assert future.result(timeout=30) == expected
+    finally:
+        bot.close()
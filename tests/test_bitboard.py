@@ -0,0 +1,44 @@
+import random
+
+from tetris_engine import COMMANDS, Tetris
+from tetris_pieces import PIECES
+
+
+def test_bitboard_collisions_match_list_board():
+    rng = random.Random(1)
+    for trial in range(50):
+        board, bitboard = Tetris(seed=trial), Tetris(use_bitboard=True, seed=trial)
+        for _ in range(rng.randrange(60)):
+            command = rng.choice(COMMANDS)
+            board.apply_command(command)
+            bitboard.apply_command(command)
+        assert board.board == bitboard.board
+        for _ in range(200):
+            piece = PIECES[rng.randrange(len(PIECES))][rng.randrange(4)]
+            x, y = rng.randrange(-8, 16), rng.randrange(-5, 25)
+            assert board.check_collision(x, y, piece) == bitboard.check_collision(x, y, piece)
+
+
+def test_bitboard_undo_and_restore_keep_rows_in_sync():
+    rng = random.Random(2)
+    board = Tetris(seed=5, undo_limit=10)
+    bitboard = Tetris(use_bitboard=True, seed=5, undo_limit=10)
+    for step in range(2000):
+        if rng.random() < 0.05:
+            board.undo()
+            bitboard.undo()
+        elif rng.random() < 0.02:
+            # restore() drops the undo history, so restore both
+            state = board.snapshot()
+            board.restore(state)
+            bitboard.restore(state)
+        else:
+            command = rng.choice(COMMANDS)
+            board.apply_command(command)
+            bitboard.apply_command(command)
+        if board.game_over:
+            board.reset(seed=step)
+            bitboard.reset(seed=step)
+        assert board.board == bitboard.board
+        assert bitboard.bitboard.occupancy() == [
+            sum(1 << x for x, cell in enumerate(row) if cell) for row in board.board]
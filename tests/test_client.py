@@ -0,0 +1,26 @@
+import socket
+
+from tetris_client import ServerConnection
+from tetris_engine import Tetris
+from tetris_net import GAMES, JOINED, SNAPSHOT, GameMirror, encode_games, encode_joined, encode_snapshot
+
+
+def test_wait_for_keeps_other_messages_for_poll():
+    server, client = socket.socketpair()
+    connection = ServerConnection(client)
+    game = Tetris(seed=4)
+    # The played game's snapshot can arrive in the same chunk as the game list
+    server.sendall(encode_joined(7, 'player') + encode_snapshot(7, game) + encode_games([3, 7]))
+    try:
+        connection.wait_for(JOINED)
+        assert connection.wait_for(GAMES) == ((3, 7),)
+        messages = connection.poll()
+        assert [kind for kind, _ in messages] == [SNAPSHOT]
+        mirror = GameMirror()
+        for kind, fields in messages:
+            mirror.apply(kind, fields)
+        assert mirror.games[7].board == game.board
+        assert connection.poll() == []
+    finally:
+        server.close()
+        connection.close()
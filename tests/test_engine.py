@@ -0,0 +1,13 @@
+from tetris_engine import Tetris
+
+
+def test_gravity_keeps_its_speed_at_any_tick_rate():
+    rows = []
+    for tick_rate in (30, 60, 120, 240):
+        game = Tetris(seed=2, tick_rate=tick_rate)
+        # Three seconds of play, one tick at a time
+        for _ in range(3 * tick_rate):
+            game.tick()
+        rows.append(game.piece_y)
+    assert rows == [rows[1]] * len(rows)
+    assert rows[1] > 0
@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+import pytest
+
+from tetris_ai import _column_tops, board_rows, enumerate_placements, evaluate
+from tetris_engine import BOARD_HEIGHT, BOARD_WIDTH
+from tetris_features import board_features, generate_placements, placement_buffer
+from tetris_pieces import PIECES
+
+
+def random_board(rng):
+    """A ragged stack with holes and overhangs, without full rows"""
+    board = np.zeros((BOARD_HEIGHT, BOARD_WIDTH), dtype=bool)
+    for x in range(BOARD_WIDTH):
+        height = rng.randrange(BOARD_HEIGHT - 6)
+        for y in range(BOARD_HEIGHT - height, BOARD_HEIGHT):
+            board[y, x] = rng.random() < 0.8
+    for y in range(BOARD_HEIGHT):
+        if board[y].all():
+            board[y, rng.randrange(BOARD_WIDTH)] = False
+    return board
+
+
+def vectorised_placements(board, shape_id, spawn_x):
+    """Return ({(rotation, x): (packed rows, lines)}, candidate boards, lines) from generate_placements"""
+    out = placement_buffer(BOARD_HEIGHT)
+    count, rotations, xs, lines = generate_placements(board, shape_id, spawn_x, out=out)
+    boards = out[:count]
+    return {(int(rotations[i]), int(xs[i])): (board_rows(boards[i]), int(lines[i]))
+            for i in range(count)}, boards, lines
+
+
+def test_generate_placements_matches_bot_enumeration():
+    rng = random.Random(21)
+    for _ in range(60):
+        board = random_board(rng)
+        rows = board_rows(board)
+        for shape_id in range(len(PIECES)):
+            spawn_x = BOARD_WIDTH // 2 - PIECES[shape_id][0].width // 2
+            expected = {(rotation, x): (new_rows, lines) for rotation, x, new_rows, lines in
+                        enumerate_placements(rows, shape_id, spawn_x)}
+            placements, _, _ = vectorised_placements(board, shape_id, spawn_x)
+            assert placements == expected
+
+
+def test_board_features_match_scalar_evaluation():
+    rng = random.Random(22)
+    unit = dict.fromkeys(('height', 'lines', 'holes', 'bumpiness'), 0)
+    for _ in range(40):
+        board = random_board(rng)
+        shape_id = rng.randrange(len(PIECES))
+        spawn_x = BOARD_WIDTH // 2 - PIECES[shape_id][0].width // 2
+        placements, boards, lines = vectorised_placements(board, shape_id, spawn_x)
+        features = board_features(boards)
+        for i, (new_rows, cleared) in enumerate(placements.values()):
+            tops = _column_tops(new_rows, BOARD_WIDTH, BOARD_HEIGHT)
+            assert list(features['heights'][i]) == [BOARD_HEIGHT - top for top in tops]
+            assert features['max_height'][i] == BOARD_HEIGHT - min(tops)
+            for weight, name in (('height', 'aggregate_height'), ('holes', 'holes'),
+                                 ('bumpiness', 'bumpiness')):
+                scalar = evaluate(new_rows, cleared, dict(unit, **{weight: 1}), BOARD_WIDTH, BOARD_HEIGHT)
+                assert features[name][i] == pytest.approx(scalar)
+            assert lines[i] == cleared
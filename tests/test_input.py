@@ -0,0 +1,54 @@
+from tetris_engine import Tetris
+from tetris_input import InputBus
+
+TICK = 1 / 60
+
+
+def test_held_down_does_not_carry_over_into_next_piece():
+    # Short enough that an instant burst of soft drops would outlast the first piece
+    game = Tetris(seed=3, height=8)
+    bus = InputBus(das=0.1, arr=0)
+    bus.press('DOWN', 'keyboard', 0.0)
+    for step in range(1, 600):
+        # The main loop's order: inputs, then gravity, ending held soft drops at each lock
+        spawned = game.pieces_spawned
+        for _, command, _ in bus.collect(step * TICK):
+            assert game.pieces_spawned == spawned, 'soft drop applied to the next piece'
+            game.apply_command(command)
+            if game.pieces_spawned != spawned:
+                bus.piece_locked()
+        if game.pieces_spawned == spawned:
+            game.tick()
+            if game.pieces_spawned != spawned:
+                bus.piece_locked()
+        if game.pieces_spawned != spawned:
+            break
+    assert game.pieces_spawned == 2
+    # Still held, but the new piece only falls by gravity until DOWN is pressed again
+    for step in range(step + 1, step + 20):
+        assert bus.collect(step * TICK) == []
+    bus.release('DOWN', 'keyboard', step * TICK)
+    bus.press('DOWN', 'keyboard', step * TICK)
+    assert [command for _, command, _ in bus.collect((step + 1) * TICK)] == ['DOWN']
+
+
+def test_instant_repeat_only_slides_sideways():
+    bus = InputBus(das=0.1, arr=0)
+    bus.press('LEFT', 'keyboard', 0.0)
+    bus.press('DOWN', 'gesture', 0.0)
+    commands = [command for _, command, _ in bus.collect(0.2)]
+    assert commands.count('DOWN') == 2
+    assert commands.count('LEFT') > 2
+
+
+def test_held_down_repeats_once_per_collect_between_other_events():
+    bus = InputBus(das=0.1, arr=0)
+    bus.press('DOWN', 'keyboard', 0.0)
+    assert [command for _, command, _ in bus.collect(0.0)] == ['DOWN']
+    # Each event in the collect window runs the auto-repeat up to its own time
+    for timestamp in (0.2, 0.3, 0.4):
+        bus.press('ROTATE', 'keyboard', timestamp)
+        bus.release('ROTATE', 'keyboard', timestamp + 0.05)
+    commands = [command for _, command, _ in bus.collect(0.5)]
+    assert commands.count('DOWN') == 1
+    assert commands.count('ROTATE') == 3
@@ -0,0 +1,53 @@
+from tetris_ai import TetrisBot
+from tetris_engine import GameState, Tetris
+
+
+def fields(state):
+    return tuple(getattr(state, name) for name in GameState.__slots__)
+
+
+def test_undo_after_lock_and_line_clear_returns_to_pre_lock_snapshot():
+    bot = TetrisBot()
+    for use_bitboard in (False, True):
+        game = Tetris(use_bitboard=use_bitboard, seed=8, undo_limit=4)
+        clears = 0
+        while game.pieces_spawned < 80 and not game.game_over:
+            for command in bot.plan_moves(game)[:-1]:
+                game.apply_command(command)
+            # Walk the piece onto its landing row, so the next DOWN locks it
+            while game.piece_y < game.ghost_y:
+                game.apply_command('DOWN')
+            before = game.snapshot()
+            lines = game.lines_cleared
+            game.apply_command('DOWN')
+            assert game.pieces_spawned == before.pieces_spawned + 1
+            clears += game.lines_cleared > lines
+            assert game.undo()
+            assert fields(game.snapshot()) == fields(before)
+            if use_bitboard:
+                assert game.bitboard.occupancy() == [
+                    sum(1 << x for x, cell in enumerate(row) if cell) for row in game.board]
+            game.apply_command('DOWN')
+        assert clears > 0
+
+
+def test_restore_round_trips_snapshot_on_both_boards():
+    for use_bitboard in (False, True):
+        game = Tetris(use_bitboard=use_bitboard, seed=9)
+        bot = TetrisBot()
+        while game.pieces_spawned < 30 and not game.game_over:
+            for command in bot.plan_moves(game):
+                game.apply_command(command)
+            game.tick(7)
+        state = game.snapshot()
+        copy = Tetris(use_bitboard=use_bitboard, seed=0)
+        copy.restore(state)
+        assert fields(copy.snapshot()) == fields(state)
+        # The restored game plays on exactly like the original
+        for command in ('LEFT', 'ROTATE', 'HARD_DROP', 'RIGHT', 'HARD_DROP'):
+            game.apply_command(command)
+            copy.apply_command(command)
+        game.tick(30)
+        copy.tick(30)
+        assert fields(copy.snapshot()) == fields(game.snapshot())
+        assert fields(game.clone().snapshot()) == fields(game.snapshot())
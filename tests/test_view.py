@@ -0,0 +1,38 @@
+import random
+
+from tetris_keyboard import BoardRenderer, Tetris, scroll_offset
+
+ROWS = BoardRenderer.VISIBLE_ROWS
+
+
+def test_scroll_offset_keeps_piece_row_on_screen():
+    for height in (ROWS - 2, ROWS, ROWS + 1, 200):
+        for piece_y in range(height):
+            for landing_bottom in range(piece_y + 1, height + 1):
+                offset = scroll_offset(piece_y, landing_bottom, height)
+                assert 0 <= offset <= max(height - ROWS, 0)
+                assert offset <= piece_y < offset + ROWS
+                if landing_bottom - piece_y <= ROWS // 2:
+                    # Short drops show the landing spot too
+                    assert landing_bottom <= offset + ROWS
+
+
+def test_standard_board_never_scrolls():
+    game = Tetris(seed=1)
+    for _ in range(500):
+        game.tick(7)
+        game.follow_piece()
+        assert game.view_offset == 0
+
+
+def test_tall_board_follows_piece():
+    game = Tetris(seed=2, height=200)
+    rng = random.Random(2)
+    for _ in range(5000):
+        if rng.random() < 0.2:
+            game.apply_command(rng.choice(('LEFT', 'RIGHT', 'ROTATE', 'DOWN')))
+        game.tick(5)
+        if game.game_over:
+            game.reset()
+        game.follow_piece()
+        assert game.view_offset <= game.piece_y < game.view_offset + ROWS
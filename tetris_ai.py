@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+# Placement-search bot for the Tetris engine.
+# For every spawned piece it enumerates each reachable (rotation, column)
+# placement, scores the resulting boards with a weighted heuristic and can
+# look one or two pieces ahead (averaged over the possible next shapes),
+# spreading the look-ahead work over a process pool. plan_async() runs the
+# search on a background thread so a game loop keeps drawing meanwhile.
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from tetris_engine import BOARD_HEIGHT, BOARD_WIDTH, Tetris
+from tetris_pieces import PIECES
+
+# Heuristic weights: aggregate height, lines cleared, holes, bumpiness
+DEFAULT_WEIGHTS = {
+    'height': -0.510066,
+    'lines': 0.760666,
+    'holes': -0.35663,
+    'bumpiness': -0.184483,
+}
+
+# Rotation states with distinct layouts per shape (the O piece only needs one)
+DISTINCT_ROTATIONS = tuple(
+    tuple(piece.rotation for piece in rotations
+          if piece.grid not in [other.grid for other in rotations[:piece.rotation]])
+    for rotations in PIECES
+)
+
+
+def board_rows(board):
+    """Pack a Tetris board (rows of colour values) into row bitmasks"""
+    return [sum(1 << x for x, cell in enumerate(row) if cell) for row in board]
+
+
+def _fits(rows, masks, x, y, height):
+    """Check that a piece (row masks, x >= 0) fits at (x, y) on packed rows"""
+    for row_idx, mask in enumerate(masks):
+        board_y = y + row_idx
+        if board_y >= height or rows[board_y] & (mask << x):
+            return False
+    return True
+
+
+def _column_tops(rows, width, height):
+    """Row index of the highest filled cell of each column (height when empty)"""
+    tops = [height] * width
+    seen = 0
+    for y, row in enumerate(rows):
+        new = row & ~seen
+        if new:
+            seen |= new
+            x = 0
+            while new:
+                if new & 1:
+                    tops[x] = y
+                new >>= 1
+                x += 1
+    return tops
+
+
+def _place(rows, piece, x, width, height, tops):
+    """Drop piece from the top at column x; return (new rows, lines cleared) or None"""
+    masks = piece.row_masks
+    if not _fits(rows, masks, x, 0, height):
+        return None
+    # Resting row from the column surfaces, stepping only under overhangs
+    y = min(tops[x + col] - 1 - bottom for col, bottom in enumerate(piece.bottom))
+    if y < 0:
+        y = 0
+        while _fits(rows, masks, x, y + 1, height):
+            y += 1
+    new_rows = list(rows)
+    for row_idx, mask in enumerate(masks):
+        new_rows[y + row_idx] |= mask << x
+    full_row = (1 << width) - 1
+    kept = [row for row in new_rows if row != full_row]
+    lines = height - len(kept)
+    if lines:
+        new_rows = [0] * lines + kept
+    return new_rows, lines
+
+
+def evaluate(rows, lines, weights, width, height):
+    """Score a board: weighted aggregate height, holes, bumpiness and lines cleared"""
+    tops = _column_tops(rows, width, height)
+    heights = [height - top for top in tops]
+    # A hole is an empty cell with a filled cell somewhere above it
+    holes = 0
+    seen = 0
+    for row in rows:
+        holes += (seen & ~row).bit_count()
+        seen |= row
+    bumpiness = sum(abs(heights[x] - heights[x + 1]) for x in range(width - 1))
+    return (weights['height'] * sum(heights) +
+            weights['lines'] * lines +
+            weights['holes'] * holes +
+            weights['bumpiness'] * bumpiness)
+
+
+def enumerate_placements(rows, shape_id, spawn_x, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+    """Yield (rotation, x, new rows, lines) for every placement reachable from spawn.
+
+    A placement is reachable when each rotation at the spawn position and
+    each sideways step at the top of the board is collision free.
+    """
+    tops = _column_tops(rows, width, height)
+    rotations = PIECES[shape_id]
+    for rotation in DISTINCT_ROTATIONS[shape_id]:
+        if not all(_fits(rows, rotations[r].row_masks, spawn_x, 0, height)
+                   for r in range(rotation + 1)):
+            continue
+        piece = rotations[rotation]
+        for step in (-1, 1):
+            x = spawn_x if step == -1 else spawn_x + 1
+            while 0 <= x <= width - piece.width:
+                result = _place(rows, piece, x, width, height, tops)
+                if result is None:
+                    break
+                yield (rotation, x) + result
+                x += step
+
+
+def _search(rows, lines, depth, beam_width, weights, width, height):
+    """Value of a board after `depth` more pieces; returns (value, placements evaluated)"""
+    if depth == 0:
+        return evaluate(rows, lines, weights, width, height), 0
+    spawn_count = 0
+    total = 0.0
+    evaluated = 0
+    for shape_id in range(len(PIECES)):
+        spawn_x = width // 2 - PIECES[shape_id][0].width // 2
+        children = [(evaluate(child_rows, child_lines, weights, width, height), child_rows, child_lines)
+                    for _, _, child_rows, child_lines in enumerate_placements(rows, shape_id, spawn_x,
+                                                                              width, height)]
+        evaluated += len(children)
+        if not children:
+            # This shape would top out: count it as a very bad outcome
+            total += -1000.0
+            spawn_count += 1
+            continue
+        best = max(child[0] for child in children)
+        if depth > 1:
+            children.sort(key=lambda child: child[0], reverse=True)
+            best = None
+            for _, child_rows, child_lines in children[:beam_width]:
+                value, count = _search(child_rows, child_lines, depth - 1, beam_width,
+                                       weights, width, height)
+                evaluated += count
+                best = value if best is None else max(best, value)
+        total += best
+        spawn_count += 1
+    # Lines cleared by the move that produced this board count on top of the outcome
+    return weights['lines'] * lines + total / spawn_count, evaluated
+
+
+def _search_task(task):
+    """Process-pool entry point for _search"""
+    return _search(*task)
+
+
+class TetrisBot:
+    def __init__(self, lookahead=0, beam_width=6, workers=0, weights=None):
+        """Bot that looks `lookahead` pieces ahead, using `workers` processes (0 = in-process)"""
+        self.lookahead = lookahead
+        self.beam_width = beam_width
+        self.workers = workers
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.placements_evaluated = 0
+        self._pool = None
+        self._planner = None
+
+    def choose(self, game):
+        """Return the best (rotation, x) for the game's current piece, or None"""
+        rows = game.bitboard.occupancy() if game.bitboard else board_rows(game.board)
+        width, height = BOARD_WIDTH, len(rows)
+        candidates = [(evaluate(new_rows, lines, self.weights, width, height), rotation, x, new_rows, lines)
+                      for rotation, x, new_rows, lines in enumerate_placements(
+                          rows, game.shape_id, game.piece_x, width, height)]
+        self.placements_evaluated += len(candidates)
+        if not candidates:
+            return None
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        if self.lookahead == 0:
+            return candidates[0][1], candidates[0][2]
+
+        # Only the most promising placements are expanded further
+        beam = candidates[:self.beam_width]
+        tasks = [(new_rows, lines, self.lookahead, self.beam_width, self.weights, width, height)
+                 for _, _, _, new_rows, lines in beam]
+        if self.workers:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            results = list(self._pool.map(_search_task, tasks))
+        else:
+            results = [_search_task(task) for task in tasks]
+        self.placements_evaluated += sum(count for _, count in results)
+        best = max(range(len(beam)), key=lambda index: results[index][0])
+        return beam[best][1], beam[best][2]
+
+    def plan_moves(self, game):
+        """Return the command list that puts the current piece at the best placement"""
+        choice = self.choose(game)
+        if choice is None:
+            return ['HARD_DROP']
+        rotation, x = choice
+        dx = x - game.piece_x
+        return (['ROTATE'] * rotation +
+                ['RIGHT' if dx > 0 else 'LEFT'] * abs(dx) +
+                ['HARD_DROP'])
+
+    def plan_async(self, game):
+        """Start planning the current piece on a background thread; return a Future of the command list"""
+        if self._planner is None:
+            self._planner = ThreadPoolExecutor(max_workers=1, thread_name_prefix='TetrisBot')
+        # Plan on a copy so the caller can keep ticking the game meanwhile
+        return self._planner.submit(self.plan_moves, game.clone())
+
+    def close(self):
+        """Shut down the planning thread and the worker processes"""
+        if self._planner is not None:
+            self._planner.shutdown(cancel_futures=True)
+            self._planner = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def run_benchmark(pieces=200, lookahead=1, beam_width=6, workers=0, seed=0):
+    """Play `pieces` pieces headlessly and return a dict of throughput numbers"""
+    game = Tetris(use_bitboard=True, seed=seed)
+    bot = TetrisBot(lookahead=lookahead, beam_width=beam_width, workers=workers)
+    placed = 0
+    games = 1
+    start = time.perf_counter()
+    try:
+        while placed < pieces:
+            if game.game_over:
+                game.reset()
+                games += 1
+            for command in bot.plan_moves(game):
+                game.apply_command(command)
+            placed += 1
+    finally:
+        bot.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'pieces': placed,
+        'games': games,
+        'lines': game.lines_cleared,
+        'seconds': elapsed,
+        'placements_evaluated': bot.placements_evaluated,
+        'placements_per_second': bot.placements_evaluated / elapsed,
+        'pieces_per_second': placed / elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless Tetris bot')
+    parser.add_argument('--bench', action='store_true', help='report placements evaluated per second')
+    parser.add_argument('--pieces', type=int, default=200, help='number of pieces to play')
+    parser.add_argument('--lookahead', type=int, default=1, help='pieces to look ahead (0-2)')
+    parser.add_argument('--beam-width', type=int, default=6, help='placements expanded per look-ahead level')
+    parser.add_argument('--workers', type=int, default=0, help='worker processes (0 = evaluate in-process)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the piece sequence')
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.pieces, args.lookahead, args.beam_width, args.workers, args.seed)
+    print(f"Placed {result['pieces']} pieces in {result['seconds']:.2f}s "
+          f"({result['pieces_per_second']:.1f} pieces/s), lines cleared in last game: {result['lines']}")
+    if args.bench:
+        print(f"Evaluated {result['placements_evaluated']} placements "
+              f"({result['placements_per_second']:.0f} placements/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# Vectorised Tetris: steps N independent games at once with NumPy.
+# Follows the same rules as the Tetris class (spawn position, rotation,
+# locking, line clears, scoring and levels) without any pygame dependency.
+import numpy as np
+from tetris_engine import BOARD_HEIGHT, BOARD_WIDTH
+from tetris_pieces import NUM_ROTATIONS, PIECE_COLORS, PIECES
+
+# Action codes accepted by BatchTetris.step
+ACTIONS = ('NONE', 'LEFT', 'RIGHT', 'ROTATE', 'DOWN', 'HARD_DROP')
+
+# Empty wall columns on each side of a packed row and solid floor rows below
+# the board, so out-of-bounds cells show up as ordinary collisions
+PAD = 4
+MAX_PIECE_SIZE = 4
+
+# SplitMix64 constants for the per-game piece generator
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _build_piece_tables(pieces):
+    """Return (row masks [shape, rotation, row], spawn widths) as arrays"""
+    masks = np.zeros((len(pieces), NUM_ROTATIONS, MAX_PIECE_SIZE), dtype=np.uint32)
+    widths = np.zeros(len(pieces), dtype=np.int64)
+    for shape_id, rotations in enumerate(pieces):
+        widths[shape_id] = rotations[0].width
+        for rotation, piece in enumerate(rotations):
+            masks[shape_id, rotation, :piece.height] = piece.row_masks
+    return masks, widths
+
+
+class BatchTetris:
+    def __init__(self, num_games, seeds=None, width=BOARD_WIDTH, height=BOARD_HEIGHT,
+                 num_colors=len(PIECE_COLORS), pieces=PIECES):
+        """Create num_games independent games; seeds gives one RNG seed per game"""
+        self.num_games = num_games
+        self.width = width
+        self.height = height
+        self.num_colors = num_colors
+        self.masks, self.spawn_widths = _build_piece_tables(pieces)
+        self.num_shapes = len(pieces)
+
+        # Packed rows: board columns live in bits PAD..PAD+width-1, the bits
+        # either side are permanently set walls
+        row_bits = (1 << (width + 2 * PAD)) - 1
+        self.FULL_ROW = np.uint32(row_bits)
+        self.EMPTY_ROW = np.uint32(row_bits & ~(((1 << width) - 1) << PAD))
+
+        if seeds is None:
+            seeds = np.random.SeedSequence().generate_state(num_games, dtype=np.uint64)
+        self.seeds = np.asarray(seeds, dtype=np.uint64).reshape(num_games).copy()
+        self.reset()
+
+    def reset(self, mask=None):
+        """Reset the selected games (all by default) to their initial state"""
+        idx = self._indices(mask, include_over=True)
+        if not hasattr(self, 'rows'):
+            n = self.num_games
+            self.rows = np.empty((n, self.height + MAX_PIECE_SIZE), dtype=np.uint32)
+            self.rng_state = np.zeros(n, dtype=np.uint64)
+            self.shape = np.zeros(n, dtype=np.int64)
+            self.rotation = np.zeros(n, dtype=np.int64)
+            self.color = np.zeros(n, dtype=np.int64)
+            self.piece_x = np.zeros(n, dtype=np.int64)
+            self.piece_y = np.zeros(n, dtype=np.int64)
+            self.score = np.zeros(n, dtype=np.int64)
+            self.level = np.ones(n, dtype=np.int64)
+            self.lines_cleared = np.zeros(n, dtype=np.int64)
+            self.game_over = np.zeros(n, dtype=bool)
+        self.rows[idx, :self.height] = self.EMPTY_ROW
+        self.rows[idx, self.height:] = self.FULL_ROW
+        self.rng_state[idx] = self.seeds[idx]
+        self.score[idx] = 0
+        self.level[idx] = 1
+        self.lines_cleared[idx] = 0
+        self.game_over[idx] = False
+        self.spawn_new_piece(idx)
+
+    def _indices(self, mask, include_over=False):
+        """Turn an optional boolean mask into indices of the games to update"""
+        if mask is None:
+            mask = np.ones(self.num_games, dtype=bool)
+        else:
+            mask = np.asarray(mask, dtype=bool)
+        if not include_over:
+            mask = mask & ~self.game_over
+        return np.flatnonzero(mask)
+
+    def _next_random(self, idx):
+        """Advance the SplitMix64 generator of the given games"""
+        state = self.rng_state[idx] + _GOLDEN_GAMMA
+        self.rng_state[idx] = state
+        z = (state ^ (state >> np.uint64(30))) * _MIX_1
+        z = (z ^ (z >> np.uint64(27))) * _MIX_2
+        return z ^ (z >> np.uint64(31))
+
+    def spawn_new_piece(self, idx):
+        """Spawn a new piece for the games in idx and flag any that top out"""
+        if len(idx) == 0:
+            return
+        value = self._next_random(idx)
+        shape = (value % np.uint64(self.num_shapes)).astype(np.int64)
+        self.shape[idx] = shape
+        self.color[idx] = ((value >> np.uint64(32)) % np.uint64(self.num_colors)).astype(np.int64)
+        self.rotation[idx] = 0
+        self.piece_x[idx] = self.width // 2 - self.spawn_widths[shape] // 2
+        self.piece_y[idx] = 0
+        self.game_over[idx] |= self._collides(idx, self.piece_x[idx], self.piece_y[idx],
+                                              shape, self.rotation[idx])
+
+    def _collides(self, idx, x, y, shape, rotation):
+        """Vectorised collision test of the given piece placements"""
+        masks = self.masks[shape, rotation]
+        shift = (x + PAD).astype(np.uint32)
+        hit = np.zeros(len(idx), dtype=bool)
+        for row_idx in range(MAX_PIECE_SIZE):
+            hit |= (self.rows[idx, y + row_idx] & (masks[:, row_idx] << shift)) != 0
+        return hit
+
+    def move(self, dx, mask=None):
+        """Move pieces horizontally by dx (scalar or per-game array) where possible"""
+        idx = self._indices(mask)
+        dx = np.broadcast_to(np.asarray(dx, dtype=np.int64), (self.num_games,))[idx]
+        new_x = self.piece_x[idx] + dx
+        ok = ~self._collides(idx, new_x, self.piece_y[idx], self.shape[idx], self.rotation[idx])
+        self.piece_x[idx[ok]] = new_x[ok]
+
+    def rotate(self, mask=None):
+        """Rotate pieces clockwise where the rotated piece fits"""
+        idx = self._indices(mask)
+        new_rotation = (self.rotation[idx] + 1) % NUM_ROTATIONS
+        ok = ~self._collides(idx, self.piece_x[idx], self.piece_y[idx], self.shape[idx], new_rotation)
+        self.rotation[idx[ok]] = new_rotation[ok]
+
+    def drop(self, mask=None):
+        """Move pieces down one row, locking the ones that cannot fall; return moved mask"""
+        idx = self._indices(mask)
+        moved = np.zeros(self.num_games, dtype=bool)
+        blocked = self._collides(idx, self.piece_x[idx], self.piece_y[idx] + 1,
+                                 self.shape[idx], self.rotation[idx])
+        falling = idx[~blocked]
+        self.piece_y[falling] += 1
+        moved[falling] = True
+        self._lock_and_spawn(idx[blocked])
+        return moved
+
+    def hard_drop(self, mask=None):
+        """Drop pieces straight down and lock them"""
+        idx = self._indices(mask)
+        falling = idx
+        while len(falling):
+            blocked = self._collides(falling, self.piece_x[falling], self.piece_y[falling] + 1,
+                                     self.shape[falling], self.rotation[falling])
+            falling = falling[~blocked]
+            self.piece_y[falling] += 1
+        self._lock_and_spawn(idx)
+
+    def _lock_and_spawn(self, idx):
+        """Lock the current pieces of idx, clear lines and spawn replacements"""
+        if len(idx) == 0:
+            return
+        masks = self.masks[self.shape[idx], self.rotation[idx]]
+        shift = (self.piece_x[idx] + PAD).astype(np.uint32)
+        y = self.piece_y[idx]
+        for row_idx in range(MAX_PIECE_SIZE):
+            self.rows[idx, y + row_idx] |= masks[:, row_idx] << shift
+        self._clear_lines(idx)
+        self.spawn_new_piece(idx)
+
+    def _clear_lines(self, idx):
+        """Remove full rows of the given games and update score and level"""
+        board = self.rows[idx, :self.height]
+        full = board == self.FULL_ROW
+        counts = full.sum(axis=1)
+        has_lines = counts > 0
+        if not has_lines.any():
+            return
+        idx, board, full, counts = idx[has_lines], board[has_lines], full[has_lines], counts[has_lines]
+
+        # Every kept row falls by the number of full rows beneath it
+        full_below = np.cumsum(full[:, ::-1], axis=1)[:, ::-1] - full
+        dest = np.arange(self.height) + full_below
+        compacted = np.full_like(board, self.EMPTY_ROW)
+        game, row = np.nonzero(~full)
+        compacted[game, dest[game, row]] = board[game, row]
+        self.rows[idx, :self.height] = compacted
+
+        self.lines_cleared[idx] += counts
+        self.score[idx] += counts * 100 * self.level[idx]
+        self.level[idx] = self.lines_cleared[idx] // 10 + 1
+
+    def step(self, actions):
+        """Apply one action code per game (see ACTIONS)"""
+        actions = np.asarray(actions)
+        self.move(-1, actions == 1)
+        self.move(1, actions == 2)
+        self.rotate(actions == 3)
+        self.drop(actions == 4)
+        self.hard_drop(actions == 5)
+
+    def boards(self):
+        """Return occupancy as a (num_games, height, width) boolean array"""
+        bits = (self.rows[:, :self.height, None] >> (np.arange(self.width, dtype=np.uint32) + PAD)) & 1
+        return bits.astype(bool)
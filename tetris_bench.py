@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+# Benchmark suite for the engine, the renderer, the gesture pipeline and the
+# whole game loop. `run` writes the results to JSON and `compare` flags
+# benchmarks that got slower than a baseline by more than a threshold, so
+# every optimisation can be backed by numbers.
+#
+#   python tetris_bench.py run --output after.json
+#   python tetris_bench.py compare before.json after.json --threshold 0.1
+#
+# Groups whose dependencies are missing (pygame, OpenCV / MediaPipe) are
+# skipped rather than failing the run.
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+
+from tetris_engine import BOARD_HEIGHT, BOARD_WIDTH, COMMANDS, Tetris
+
+GROUPS = ('engine', 'render', 'gesture', 'loop')
+RESULTS_VERSION = 1
+
+
+def _timeit(func, number, repeat=5):
+    """Seconds per call of func: (best, median) over `repeat` runs of `number` calls"""
+    runs = [total / number for total in timeit.Timer(func).repeat(repeat=repeat, number=number)]
+    return min(runs), statistics.median(runs)
+
+
+def _result(best, median, ops):
+    return {'seconds': best, 'median_seconds': median, 'ops': ops}
+
+
+def _samples(times):
+    """Result entry from per-operation durations"""
+    return _result(min(times), statistics.median(times), len(times))
+
+
+def _stacked_game(use_bitboard=False, height=BOARD_HEIGHT, seed=0, pieces=12):
+    """Seeded game with a few random pieces locked at the bottom"""
+    game = Tetris(use_bitboard=use_bitboard, seed=seed, height=height)
+    rng = random.Random(seed)
+    for _ in range(pieces):
+        for _ in range(rng.randrange(5)):
+            game.apply_command(rng.choice(('LEFT', 'RIGHT', 'ROTATE')))
+        game.apply_command('HARD_DROP')
+    return game
+
+
+def play_seeded_game(seed=0, max_pieces=300, use_bitboard=False):
+    """Play a game from a seeded random command stream; return the finished game"""
+    game = Tetris(use_bitboard=use_bitboard, seed=seed)
+    rng = random.Random(seed)
+    while not game.game_over and game.pieces_spawned <= max_pieces:
+        game.apply_command(rng.choice(COMMANDS))
+        game.tick(rng.randrange(1, 20))
+    return game
+
+
+def bench_engine(scale=1.0):
+    """Micro-benchmarks of the rules engine"""
+    results = {}
+    number = max(1, int(20000 * scale))
+    for use_bitboard, suffix in ((False, ''), (True, '.bitboard')):
+        game = _stacked_game(use_bitboard)
+        piece = game.piece
+        x, y = game.piece_x, game.ghost_y
+        results['engine.check_collision' + suffix] = _result(
+            *_timeit(lambda: game.check_collision(x, y, piece), number), number)
+        results['engine.rotate_piece' + suffix] = _result(*_timeit(game.rotate_piece, number), number)
+
+    # Four full rows under the stack, refilled before every clear
+    for height, suffix in ((BOARD_HEIGHT, ''), (5000, '.tall')):
+        game = _stacked_game(height=height)
+        board = game.board
+        tops = list(game.column_tops)
+
+        def clear():
+            board[height - 4:] = [[1] * BOARD_WIDTH for _ in range(4)]
+            game.column_tops = [min(top, height - 4) for top in tops]
+            game.clear_lines(height - 4, height)
+        results['engine.clear_lines' + suffix] = _result(*_timeit(clear, max(1, number // 4)),
+                                                         max(1, number // 4))
+
+    games = max(1, int(20 * scale))
+    results['engine.seeded_game'] = _result(*_timeit(lambda: play_seeded_game(), games, repeat=3), games)
+    return results
+
+
+def _offscreen_pygame():
+    """Import pygame on the dummy video driver and open an offscreen display"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    pygame.init()
+    return pygame
+
+
+def bench_render(scale=1.0):
+    """Frame times of Tetris.draw on an offscreen surface"""
+    pygame = _offscreen_pygame()
+    import tetris_keyboard
+
+    screen = pygame.display.set_mode((tetris_keyboard.SCREEN_WIDTH, tetris_keyboard.SCREEN_HEIGHT))
+    frames = max(10, int(1000 * scale))
+    results = {}
+    for full, name in ((False, 'render.draw'), (True, 'render.draw.full')):
+        game = tetris_keyboard.Tetris(seed=0)
+        rng = random.Random(0)
+        times = []
+        for frame in range(frames):
+            # A move every few frames, gravity every frame, like real play
+            if frame % 4 == 0:
+                game.apply_command(rng.choice(COMMANDS[:4]))
+            game.tick()
+            if game.game_over:
+                game.reset()
+            if full and game.renderer is not None:
+                # Forget the last frame so every cell is blitted again
+                game.renderer.target = None
+            start = time.perf_counter()
+            game.draw(screen)
+            times.append(time.perf_counter() - start)
+        results[name] = _samples(times)
+    pygame.quit()
+    return results
+
+
+def synthetic_clip(path, frames=120, width=640, height=480, seed=0):
+    """Write a .npy clip of a skin-toned blob drifting over a noisy background; return the path"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    clip = rng.integers(0, 60, size=(frames, height, width, 3), dtype=np.uint8)
+    ys, xs = np.mgrid[0:height, 0:width]
+    for index in range(frames):
+        cx = width * (0.2 + 0.6 * index / frames)
+        cy = height * 0.5
+        blob = (xs - cx) ** 2 / 60 ** 2 + (ys - cy) ** 2 / 90 ** 2 <= 1
+        clip[index][blob] = (120, 160, 220)
+    np.save(path, clip)
+    return path
+
+
+def bench_gesture(scale=1.0, clip=None):
+    """Throughput of HandGestureController.get_finger_position on a clip, camera and imshow stubbed"""
+    import cv2
+    from tetris_frame_source import open_frame_source
+    from tetris_gesture_control import HandGestureController
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        if clip is None:
+            clip = synthetic_clip(os.path.join(directory, 'clip.npy'), frames=max(10, int(120 * scale)))
+        # Annotated frames are drawn as usual but never shown
+        imshow, wait_key = cv2.imshow, cv2.waitKey
+        cv2.imshow = lambda *args: None
+        cv2.waitKey = lambda *args: -1
+        try:
+            for adaptive, name in ((False, 'gesture.get_finger_position'),
+                                   (True, 'gesture.get_finger_position.adaptive')):
+                source = open_frame_source(clip, realtime=False)
+                controller = HandGestureController(frame_source=source, adaptive=adaptive)
+                controller.warm_up()
+                times = []
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        controller.get_finger_position()
+                        if source.finished:
+                            break
+                        times.append(time.perf_counter() - start)
+                finally:
+                    controller.cleanup()
+                results[name] = _samples(times)
+        finally:
+            cv2.imshow, cv2.waitKey = imshow, wait_key
+    return results
+
+
+def scripted_events(pygame, frames, seed=0):
+    """Per-frame event lists: random key presses and releases, then QUIT"""
+    keys = [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE]
+    rng = random.Random(seed)
+    held = None
+    script = []
+    for _ in range(frames):
+        events = []
+        if rng.random() < 0.2:
+            if held is not None:
+                events.append(pygame.event.Event(pygame.KEYUP, key=held))
+            held = rng.choice(keys)
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=held))
+        script.append(events)
+    script.append([pygame.event.Event(pygame.QUIT)])
+    return script
+
+
+def bench_loop(scale=1.0):
+    """Frames per second of the whole tetris_keyboard.main() loop with scripted keyboard input"""
+    pygame = _offscreen_pygame()
+    import tetris_keyboard
+
+    frames = max(10, int(600 * scale))
+    script = iter(scripted_events(pygame, frames))
+    get_events = pygame.event.get
+    # The loop reads its input from the script instead of the event queue
+    pygame.event.get = lambda *args, **kwargs: next(script)
+    start = time.perf_counter()
+    try:
+        tetris_keyboard.main(['--input', 'keyboard', '--seed', '0', '--fps', '0'])
+    finally:
+        pygame.event.get = get_events
+    elapsed = time.perf_counter() - start
+    pygame.quit()
+    return {'loop.main': _result(elapsed / frames, elapsed / frames, frames)}
+
+
+def run(groups=GROUPS, scale=1.0, clip=None):
+    """Run the selected benchmark groups; return the results document"""
+    runners = {
+        'engine': lambda: bench_engine(scale),
+        'render': lambda: bench_render(scale),
+        'gesture': lambda: bench_gesture(scale, clip),
+        'loop': lambda: bench_loop(scale),
+    }
+    results = {}
+    skipped = {}
+    for group in groups:
+        try:
+            group_results = runners[group]()
+        except ImportError as exc:
+            skipped[group] = str(exc)
+            print(f"{group}: skipped ({exc})")
+            continue
+        for name, result in group_results.items():
+            print(f"{name:<42} {result['seconds'] * 1e6:12.2f} us")
+        results.update(group_results)
+    return {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'scale': scale,
+        'skipped': skipped,
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """Return (name, baseline seconds, current seconds, change) rows and the names that regressed"""
+    rows = []
+    regressions = []
+    for name, old in sorted(baseline['results'].items()):
+        new = current['results'].get(name)
+        if new is None:
+            continue
+        change = new['seconds'] / old['seconds'] - 1
+        rows.append((name, old['seconds'], new['seconds'], change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tetris performance benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run benchmarks and write the results as JSON')
+    run_parser.add_argument('--groups', default=','.join(GROUPS),
+                            help=f'comma-separated benchmark groups (default: {",".join(GROUPS)})')
+    run_parser.add_argument('--output', default='bench.json', help='results file (default: bench.json)')
+    run_parser.add_argument('--scale', type=float, default=1.0,
+                            help='multiply iteration counts, e.g. 0.1 for a quick run')
+    run_parser.add_argument('--clip', default=None,
+                            help='.npy or video clip for the gesture benchmark (default: synthetic)')
+    compare_parser = commands.add_parser('compare', help='flag regressions against a baseline')
+    compare_parser.add_argument('baseline', help='results JSON to compare against')
+    compare_parser.add_argument('current', help='results JSON of the change')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='relative slowdown reported as a regression (default 0.1 = 10%%)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        groups = [group.strip() for group in args.groups.split(',') if group.strip()]
+        unknown = set(groups) - set(GROUPS)
+        if unknown:
+            parser.error(f"Unknown benchmark groups: {', '.join(sorted(unknown))}")
+        document = run(groups, args.scale, args.clip)
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"Wrote {len(document['results'])} results to {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows, regressions = compare(baseline, current, args.threshold)
+    for name, old, new, change in rows:
+        flag = '  REGRESSION' if name in regressions else ''
+        print(f"{name:<42} {old * 1e6:12.2f} us -> {new * 1e6:12.2f} us  {change:+7.1%}{flag}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
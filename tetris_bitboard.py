@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Bitboard storage for the Tetris board: one integer bitmask per row
+# (bit PAD + x set = column x occupied) so collision is one AND per piece row.
+
+# Permanently set wall bits on each side of a row and solid floor rows below
+# the board (as in BatchTetris), so out-of-bounds cells are ordinary collisions
+PAD = 4
+FLOOR_ROWS = 4
+
+
+class BitBoard:
+    def __init__(self, width, height):
+        """Create an empty board of the given size"""
+        self.width = width
+        self.height = height
+        self.FULL_ROW = (1 << (width + 2 * PAD)) - 1
+        self.EMPTY_ROW = self.FULL_ROW & ~(((1 << width) - 1) << PAD)
+        # Largest shift that keeps a piece's left column inside the right wall
+        self.max_shift = width + PAD
+        self.reset()
+
+    def reset(self):
+        """Clear every row"""
+        # Occupancy bitmasks used for collision and line checks, floor rows last
+        self.rows = [self.EMPTY_ROW] * self.height + [self.FULL_ROW] * FLOOR_ROWS
+        # Colour values (0 = empty) kept alongside for rendering
+        self.cells = [[0] * self.width for _ in range(self.height)]
+
+    def collides(self, x, y, masks):
+        """Check if a piece given as row masks collides at (x, y)"""
+        shift = x + PAD
+        if y < 0 or y > self.height or not 0 <= shift <= self.max_shift:
+            return self._collides_outside(x, y, masks)
+        rows = self.rows
+        for mask in masks:
+            if rows[y] & (mask << shift):
+                return True
+            y += 1
+        return False
+
+    def _collides_outside(self, x, y, masks):
+        """Collision check for positions beyond the padding: above the top or far off the sides"""
+        for row_idx, mask in enumerate(masks):
+            if not mask:
+                continue
+            board_y = y + row_idx
+            if board_y >= self.height:
+                return True
+            # Shift piece row into board columns, rejecting cells left of the wall
+            if x >= 0:
+                shifted = mask << x
+            else:
+                if mask & ((1 << -x) - 1):
+                    return True
+                shifted = mask >> -x
+            if shifted >> self.width:
+                return True
+            if board_y >= 0 and self.rows[board_y] & (shifted << PAD):
+                return True
+        return False
+
+    def place(self, x, y, masks, color):
+        """Write a piece into the board, ignoring rows above the top"""
+        for row_idx, mask in enumerate(masks):
+            board_y = y + row_idx
+            if not mask or not 0 <= board_y < self.height:
+                continue
+            self.rows[board_y] |= mask << (x + PAD)
+            cell_row = self.cells[board_y]
+            col = x
+            while mask:
+                if mask & 1 and col >= 0:
+                    cell_row[col] = color
+                mask >>= 1
+                col += 1
+
+    def clear_cell(self, x, y):
+        """Empty one cell"""
+        self.rows[y] &= ~(1 << (x + PAD))
+        self.cells[y][x] = 0
+
+    def load_rows(self, occupancy):
+        """Set the row bitmasks from unpadded ones (bit x = column x), one per board row"""
+        empty = self.EMPTY_ROW
+        self.rows = [row << PAD | empty for row in occupancy] + [self.FULL_ROW] * FLOOR_ROWS
+
+    def occupancy(self):
+        """Unpadded row bitmasks (bit x = column x) of the board rows"""
+        mask = (1 << self.width) - 1
+        return [row >> PAD & mask for row in self.rows[:self.height]]
+
+    def clear_full_rows(self, first=0, last=None, top=0):
+        """Remove full rows among [first, last), compacting the rest downwards; return cleared row indices
+
+        Rows above `top` must be empty: only the span from `top` to the lowest
+        cleared row is rewritten, so the cost follows the stack, not the board.
+        """
+        full_row = self.FULL_ROW
+        rows = self.rows
+        last = self.height if last is None else last
+        cleared = [y for y in range(first, last) if rows[y] == full_row]
+        if not cleared:
+            return cleared
+
+        count = len(cleared)
+        top = min(top, cleared[0])
+        bottom = cleared[-1] + 1
+        kept = [y for y in range(top, bottom) if rows[y] != full_row]
+        rows[top:bottom] = [self.EMPTY_ROW] * count + [rows[y] for y in kept]
+        # Cell lists are mutated in place elsewhere, so keep the same list object
+        cells = self.cells
+        cells[top:bottom] = [[0] * self.width for _ in range(count)] + [cells[y] for y in kept]
+        return cleared
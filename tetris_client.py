@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# Thin pygame client for tetris_server.py: plays one remote game with the
+# keyboard and/or shows several games side by side, e.g. on a lobby
+# display. Games are mirrored from the server's delta stream and drawn
+# with the same renderer as the local game.
+import argparse
+import socket
+import time
+
+import pygame
+
+from tetris_engine import BOARD_HEIGHT
+from tetris_input import ARR, DAS, InputBus
+from tetris_keyboard import KEY_COMMANDS, SCREEN_HEIGHT, SCREEN_WIDTH, Tetris
+from tetris_net import (DEFAULT_HOST, DEFAULT_PORT, ERROR, GAMES, JOINED, GameMirror,
+                        MessageReader, encode_create, encode_input, encode_list, encode_watch)
+
+
+class ServerConnection:
+    """Non-blocking socket to the game server, decoding messages as they arrive"""
+
+    def __init__(self, sock):
+        self.socket = sock
+        self.reader = MessageReader()
+        # Decoded messages that arrived while waiting for another kind, for the next poll()
+        self.pending = []
+
+    @classmethod
+    def connect(cls, host, port):
+        sock = socket.create_connection((host, port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(sock)
+
+    def send(self, data):
+        self.socket.sendall(data)
+
+    def wait_for(self, kind):
+        """Block until a message of the given type arrives; return its fields
+
+        Other messages are kept and handed out by the next poll().
+        """
+        while True:
+            for index, (message_kind, fields) in enumerate(self.pending):
+                if message_kind == kind:
+                    del self.pending[index]
+                    return fields
+                if message_kind == ERROR:
+                    del self.pending[index]
+                    raise ConnectionError(fields[0])
+            data = self.socket.recv(1 << 16)
+            if not data:
+                raise ConnectionError("Server closed the connection")
+            self.pending.extend(self.reader.feed(data))
+
+    def poll(self):
+        """Return the messages that arrived since the last call, without blocking"""
+        messages, self.pending = self.pending, []
+        self.socket.setblocking(False)
+        try:
+            while True:
+                data = self.socket.recv(1 << 16)
+                if not data:
+                    raise ConnectionError("Server closed the connection")
+                messages.extend(self.reader.feed(data))
+        except BlockingIOError:
+            pass
+        finally:
+            self.socket.setblocking(True)
+        return messages
+
+    def close(self):
+        self.socket.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Play or watch Tetris games on a game server')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'server address (default {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'server port (default {DEFAULT_PORT})')
+    parser.add_argument('--play', action='store_true', help='start a new game and play it with the keyboard')
+    parser.add_argument('--watch', default='',
+                        help='comma-separated game ids to watch, or "all" for the games running now')
+    parser.add_argument('--max-boards', type=int, default=4, help='most games shown with --watch all')
+    parser.add_argument('--seed', type=int, default=None, help='piece sequence seed for --play')
+    parser.add_argument('--board-height', type=int, default=BOARD_HEIGHT,
+                        help=f'rows on the board for --play (default {BOARD_HEIGHT})')
+    parser.add_argument('--fps', type=int, default=60, help='frame rate cap')
+    args = parser.parse_args(argv)
+    if not args.play and not args.watch:
+        parser.error("Use --play and/or --watch")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    connection = ServerConnection.connect(args.host, args.port)
+
+    # Board slots, left to right: the played game first, then the watched ones
+    slots = []
+    if args.play:
+        connection.send(encode_create(args.seed, args.board_height))
+        slots.append(connection.wait_for(JOINED)[0])
+    if args.watch == 'all':
+        connection.send(encode_list())
+        watch = [game_id for game_id in connection.wait_for(GAMES)[0] if game_id not in slots]
+        watch = watch[:max(args.max_boards - len(slots), 0)]
+    else:
+        watch = [int(game_id) for game_id in args.watch.split(',') if game_id.strip()]
+    for game_id in watch:
+        connection.send(encode_watch(game_id))
+        slots.append(game_id)
+    if not slots:
+        print("No games to watch")
+        return
+    played = slots[0] if args.play else None
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH * len(slots), SCREEN_HEIGHT))
+    pygame.display.set_caption('Tetris (remote)')
+    clock = pygame.time.Clock()
+    boards = [screen.subsurface((slot * SCREEN_WIDTH, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+              for slot in range(len(slots))]
+    mirror = GameMirror(factory=Tetris)
+    bus = InputBus(das=DAS, arr=ARR)
+
+    try:
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_q:
+                        return
+                    if played is None:
+                        continue
+                    if event.key in KEY_COMMANDS:
+                        bus.press(KEY_COMMANDS[event.key], 'keyboard', time.monotonic())
+                    elif event.key == pygame.K_r:
+                        game = mirror.games.get(played)
+                        if game is not None and game.game_over:
+                            connection.send(encode_input(played, 'RESET'))
+                elif event.type == pygame.KEYUP and event.key in KEY_COMMANDS:
+                    bus.release(KEY_COMMANDS[event.key], 'keyboard', time.monotonic())
+
+            # The server owns the game; moves show up once its deltas come back
+            for _, command, _ in bus.collect(time.monotonic()):
+                connection.send(encode_input(played, command))
+            game = mirror.games.get(played)
+            spawned = game.pieces_spawned if game is not None else None
+            for kind, fields in connection.poll():
+                if kind == ERROR:
+                    print(f"Server: {fields[0]}")
+                mirror.apply(kind, fields)
+            game = mirror.games.get(played)
+            if game is not None and game.pieces_spawned != spawned:
+                # A held soft drop ends with its piece
+                bus.piece_locked()
+
+            dirty = []
+            for slot, (game_id, board) in enumerate(zip(slots, boards)):
+                game = mirror.games.get(game_id)
+                if game is None:
+                    continue
+                game.follow_piece()
+                dirty.extend(rect.move(slot * SCREEN_WIDTH, 0) for rect in game.draw(board))
+            pygame.display.update(dirty)
+            clock.tick(args.fps)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
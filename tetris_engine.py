@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+# Tetris rules engine: board state, piece movement, locking, line clears
+# and scoring. No pygame or camera imports, so headless simulations,
+# bots and tools can import it in milliseconds.
+import random
+from collections import deque
+from tetris_bitboard import PAD, BitBoard
+from tetris_pieces import NUM_ROTATIONS, PIECE_COLORS, PIECES, PieceDescriptor
+from tetris_timestep import TICK_RATE
+
+# Board dimensions in cells
+BOARD_WIDTH = 10
+BOARD_HEIGHT = 20
+
+# Named input commands understood by Tetris.apply_command
+COMMANDS = ('LEFT', 'RIGHT', 'ROTATE', 'DOWN', 'HARD_DROP')
+
+# SplitMix64 piece generator, the same sequence BatchTetris produces per seed
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+_MIX_1 = 0xBF58476D1CE4E5B9
+_MIX_2 = 0x94D049BB133111EB
+_MASK_64 = (1 << 64) - 1
+
+# Maps packed colour bytes to b'0' / b'1' so a row's bitmask is one int() call
+_OCCUPIED = bytes.maketrans(bytes(range(256)), b'0' + b'1' * 255)
+
+
+class GameState:
+    """Immutable-by-convention snapshot of a Tetris game (see Tetris.snapshot)"""
+
+    __slots__ = ('board', 'column_tops', 'shape_id', 'rotation', 'color', 'piece_x', 'piece_y',
+                 'ghost_y', 'score', 'level', 'lines_cleared', 'game_over', 'pieces_spawned',
+                 'rng_state', 'fall_time', 'ticks')
+
+    def __init__(self, board, column_tops, shape_id, rotation, color, piece_x, piece_y,
+                 ghost_y, score, level, lines_cleared, game_over, pieces_spawned,
+                 rng_state, fall_time, ticks):
+        # board is packed row-major into bytes, one colour value (0 = empty) per cell
+        self.board = board
+        self.column_tops = column_tops
+        self.shape_id = shape_id
+        self.rotation = rotation
+        self.color = color
+        self.piece_x = piece_x
+        self.piece_y = piece_y
+        self.ghost_y = ghost_y
+        self.score = score
+        self.level = level
+        self.lines_cleared = lines_cleared
+        self.game_over = game_over
+        self.pieces_spawned = pieces_spawned
+        self.rng_state = rng_state
+        self.fall_time = fall_time
+        self.ticks = ticks
+
+
+def splitmix64(state):
+    """Advance a SplitMix64 state; return (new state, 64-bit output)"""
+    state = (state + _GOLDEN_GAMMA) & _MASK_64
+    z = ((state ^ (state >> 30)) * _MIX_1) & _MASK_64
+    z = ((z ^ (z >> 27)) * _MIX_2) & _MASK_64
+    return state, z ^ (z >> 31)
+
+
+class Tetris:
+    def __init__(self, use_bitboard=False, undo_limit=0, seed=None, height=BOARD_HEIGHT,
+                 tick_rate=TICK_RATE):
+        """Initialize the game state; undo_limit > 0 keeps that many locks for undo()"""
+        # Ticks per second of real time, so gravity keeps its speed at any tick rate
+        self.tick_rate = tick_rate
+        # Rows on the board; line clears only touch the occupied rows, so
+        # marathon boards can be thousands of rows tall
+        self.height = height
+        # Optional bitmask engine for fast collision / line checks
+        self.bitboard = BitBoard(BOARD_WIDTH, height) if use_bitboard else None
+        self.undo_limit = undo_limit
+        # Frames since the game was created; not cleared by reset() so recordings stay monotonic
+        self.ticks = 0
+        self.rng_state = random.getrandbits(64) if seed is None else seed & _MASK_64
+        self.reset()
+        
+    def reset(self, seed=None):
+        """Reset the game to initial state
+
+        Without a seed the piece generator carries on from the previous game,
+        so a whole session is reproducible from the first seed.
+        """
+        if seed is not None:
+            self.rng_state = seed & _MASK_64
+        self.seed = self.rng_state
+        # Create empty game board
+        if self.bitboard:
+            self.bitboard.reset()
+            self.board = self.bitboard.cells
+        else:
+            self.board = [[0 for _ in range(BOARD_WIDTH)] for _ in range(self.height)]
+        # Row index of the highest filled cell in each column (height when empty)
+        self.column_tops = [self.height] * BOARD_WIDTH
+        self.score = 0
+        self.level = 1
+        self.lines_cleared = 0
+        self.game_over = False
+        self.view_offset = 0  # For scrolling view
+        self.pieces_spawned = 0
+        self.fall_time = 0  # Frames since gravity last moved the piece
+        # Per-lock deltas, newest last (None when undo is disabled)
+        self.undo_stack = deque(maxlen=self.undo_limit) if self.undo_limit else None
+        self.spawn_new_piece()
+        
+    @property
+    def fall_speed(self):
+        """Ticks between gravity steps at the current level"""
+        # Tuned in frames at TICK_RATE, then scaled to the game's tick rate
+        return max(round(max(50 - (self.level * 3), 10) * self.tick_rate / TICK_RATE), 1)
+        
+    @property
+    def stack_top(self):
+        """Row index of the highest filled cell (height when empty); every row above it is empty"""
+        return min(self.column_tops)
+        
+    @property
+    def piece(self):
+        """Descriptor of the falling piece in its current rotation"""
+        return PIECES[self.shape_id][self.rotation]
+        
+    @property
+    def current_piece(self):
+        """Grid layout of the falling piece in its current rotation"""
+        return self.piece.grid
+        
+    def spawn_new_piece(self):
+        """Create and position a new falling piece"""
+        self.pieces_spawned += 1
+        self.rng_state, value = splitmix64(self.rng_state)
+        self.shape_id = value % len(PIECES)
+        self.rotation = 0
+        self.current_color = (value >> 32) % len(PIECE_COLORS)
+        # Center the piece horizontally
+        self.piece_x = BOARD_WIDTH // 2 - self.piece.width // 2
+        self.piece_y = 0
+        
+        # Calculate ghost piece position (preview of where piece will land)
+        self.ghost_y = self.landing_row(self.piece_x, self.piece_y, self.piece)
+            
+        # Check if new piece overlaps with existing pieces (game over condition)
+        if self.check_collision(self.piece_x, self.piece_y, self.piece):
+            self.game_over = True
+            
+    def check_collision(self, x, y, piece):
+        """Check if piece (a PieceDescriptor or a grid) collides with board boundaries or other pieces"""
+        if not isinstance(piece, PieceDescriptor):
+            return self._check_grid_collision(x, y, piece)
+        bitboard = self.bitboard
+        if bitboard:
+            # Walls and floor are set bits, so on the board this is one AND per piece row
+            shift = x + PAD
+            if 0 <= shift <= bitboard.max_shift and 0 <= y <= self.height:
+                rows = bitboard.rows
+                for mask in piece.shifted_masks[shift]:
+                    if rows[y] & mask:
+                        return True
+                    y += 1
+                return False
+            return bitboard.collides(x, y, piece.row_masks)
+        board = self.board
+        for col_idx, row_idx in piece.cells:
+            board_x = x + col_idx
+            board_y = y + row_idx
+            # Check boundaries and existing pieces
+            if (board_x < 0 or board_x >= BOARD_WIDTH or 
+                board_y >= self.height or 
+                (board_y >= 0 and board[board_y][board_x])):
+                return True
+        return False
+        
+    def _check_grid_collision(self, x, y, piece):
+        """Collision check for an arbitrary piece grid"""
+        for row_idx, row in enumerate(piece):
+            for col_idx, cell in enumerate(row):
+                if cell:
+                    board_x = x + col_idx
+                    board_y = y + row_idx
+                    # Check boundaries and existing pieces
+                    if (board_x < 0 or board_x >= BOARD_WIDTH or 
+                        board_y >= self.height or 
+                        (board_y >= 0 and self.board[board_y][board_x])):
+                        return True
+        return False
+        
+    def landing_row(self, x, y, piece):
+        """Return the row where piece comes to rest when dropped from (x, y)"""
+        # One pass over the piece's columns: stop just above the column surfaces
+        tops = self.column_tops
+        landing = min(tops[x + col] - 1 - bottom for col, bottom in enumerate(piece.bottom))
+        if landing >= y:
+            return landing
+        # Piece is tucked under an overhang, so the surface is above it; step down instead
+        while not self.check_collision(x, y + 1, piece):
+            y += 1
+        return y
+        
+    def move_piece(self, dx):
+        """Move piece horizontally if no collision"""
+        if not self.check_collision(self.piece_x + dx, self.piece_y, self.piece):
+            self.piece_x += dx
+            # Update ghost piece position after movement
+            self.ghost_y = self.landing_row(self.piece_x, self.piece_y, self.piece)
+            
+    def rotate_piece(self):
+        """Rotate piece if rotation is possible"""
+        # Next rotation state is precomputed, so rotating is just an index step
+        rotation = (self.rotation + 1) % NUM_ROTATIONS
+        if not self.check_collision(self.piece_x, self.piece_y, PIECES[self.shape_id][rotation]):
+            self.rotation = rotation
+            # Update ghost piece position after rotation
+            self.ghost_y = self.landing_row(self.piece_x, self.piece_y, self.piece)
+            
+    def drop_piece(self):
+        """Move piece down one step, return False if piece is locked"""
+        if not self.check_collision(self.piece_x, self.piece_y + 1, self.piece):
+            self.piece_y += 1
+            return True
+        else:
+            self.lock_piece()
+            self.spawn_new_piece()
+            return False
+            
+    def hard_drop(self):
+        """Drop the piece straight to its landing row and lock it"""
+        self.piece_y = self.landing_row(self.piece_x, self.piece_y, self.piece)
+        self.lock_piece()
+        self.spawn_new_piece()
+        
+    def tick(self, frames=1):
+        """Advance the game clock by `frames` frames, applying gravity"""
+        self.ticks += frames
+        # Jump straight from one gravity step to the next instead of frame by frame
+        while frames > 0 and not self.game_over:
+            step = min(frames, max(self.fall_speed - self.fall_time, 1))
+            self.fall_time += step
+            frames -= step
+            if self.fall_time >= self.fall_speed:
+                self.drop_piece()
+                self.fall_time = 0
+                
+    def apply_command(self, command):
+        """Apply a named input command (see COMMANDS); ignored once the game is over"""
+        if self.game_over:
+            return
+        if command == 'LEFT':
+            self.move_piece(-1)
+        elif command == 'RIGHT':
+            self.move_piece(1)
+        elif command == 'ROTATE':
+            self.rotate_piece()
+        elif command == 'DOWN':
+            self.drop_piece()
+        elif command == 'HARD_DROP':
+            self.hard_drop()
+            
+    def lock_piece(self):
+        """Lock the current piece in place and check for completed lines"""
+        tops = self.column_tops
+        if self.undo_stack is not None:
+            self._record_lock()
+        # Only rows the piece landed in can have become full
+        first_row = max(self.piece_y, 0)
+        last_row = min(self.piece_y + self.piece.height, self.height)
+        for x, y in self.piece.cells:
+            board_y = self.piece_y + y
+            if 0 <= board_y < self.height:
+                board_x = self.piece_x + x
+                if not self.bitboard:
+                    self.board[board_y][board_x] = self.current_color + 1
+                if board_y < tops[board_x]:
+                    tops[board_x] = board_y
+        if self.bitboard:
+            self.bitboard.place(self.piece_x, self.piece_y,
+                                self.piece.row_masks, self.current_color + 1)
+        if self.undo_stack is not None:
+            # Keep the rows about to be cleared for undo
+            board = self.board
+            self.undo_stack[-1][-1].extend(
+                (y, list(board[y])) for y in range(first_row, last_row) if all(board[y]))
+        self.clear_lines(first_row, last_row)
+        
+    def clear_lines(self, first_row=0, last_row=None):
+        """Remove completed lines among rows [first_row, last_row) and update score"""
+        # Rows above the stack are empty, so they can never be full
+        top = self.stack_top
+        first_row = max(first_row, top)
+        last_row = self.height if last_row is None else last_row
+        lines_cleared = 0
+        if self.bitboard:
+            lines_cleared = len(self.bitboard.clear_full_rows(first_row, last_row, top))
+        else:
+            board = self.board
+            full = [y for y in range(first_row, last_row) if all(board[y])]
+            if full:
+                # Only the span from the stack top to the lowest full row moves:
+                # its full rows are dropped and as many empty rows enter at the top.
+                # A same-length slice assignment leaves the rest of the list alone.
+                bottom = full[-1] + 1
+                board[top:bottom] = ([[0] * BOARD_WIDTH for _ in full] +
+                                     [row for row in board[top:bottom] if not all(row)])
+                lines_cleared = len(full)
+        
+        if lines_cleared > 0:
+            self._update_column_tops()
+            self.lines_cleared += lines_cleared
+            self.score += lines_cleared * 100 * self.level
+            self.level = self.lines_cleared // 10 + 1
+
+    def _update_column_tops(self):
+        """Move each column top down to its new surface after rows were removed"""
+        # Clearing only ever lowers the surface, so scan on from the old top
+        board = self.board
+        for col, y in enumerate(self.column_tops):
+            while y < self.height and not board[y][col]:
+                y += 1
+            self.column_tops[col] = y
+            
+    def recompute_column_tops(self):
+        """Rebuild column_tops from scratch, e.g. after editing self.board directly"""
+        self.column_tops = [self.height] * BOARD_WIDTH
+        for y in range(self.height - 1, -1, -1):
+            for x, cell in enumerate(self.board[y]):
+                if cell:
+                    self.column_tops[x] = y
+
+    def _record_lock(self):
+        """Push the delta needed to undo the lock that is about to happen"""
+        cells = tuple((self.piece_x + x, self.piece_y + y) for x, y in self.piece.cells
+                      if 0 <= self.piece_y + y < self.height)
+        fields = (self.shape_id, self.rotation, self.current_color, self.piece_x, self.piece_y,
+                  self.ghost_y, self.score, self.level, self.lines_cleared, self.game_over,
+                  self.pieces_spawned, self.rng_state, tuple(self.column_tops))
+        # Cleared rows are appended to the last entry by lock_piece
+        self.undo_stack.append((fields, cells, []))
+        
+    def undo(self):
+        """Return to the moment before the last lock; False when there is nothing to undo"""
+        if not self.undo_stack:
+            return False
+        fields, cells, cleared = self.undo_stack.pop()
+        (self.shape_id, self.rotation, self.current_color, self.piece_x, self.piece_y,
+         self.ghost_y, self.score, self.level, self.lines_cleared, self.game_over,
+         self.pieces_spawned, self.rng_state, tops) = fields
+        board = self.board
+        rows = self.bitboard.rows if self.bitboard else None
+        if cleared:
+            # The clear only rewrote rows from the old stack top (or the locked
+            # piece) down, and the leading rows of that span are the empty ones
+            # it added. Drop them and put the full rows back in place.
+            top = max(min(min(tops), self.piece_y), 0)
+            bottom = cleared[-1][0] + 1
+            full_rows = dict(cleared)
+            kept = iter(board[top + len(cleared):bottom])
+            board[top:bottom] = [full_rows[y] if y in full_rows else next(kept)
+                                 for y in range(top, bottom)]
+            if rows is not None:
+                kept = iter(rows[top + len(cleared):bottom])
+                rows[top:bottom] = [self.bitboard.FULL_ROW if y in full_rows else next(kept)
+                                    for y in range(top, bottom)]
+        for x, y in cells:
+            if rows is not None:
+                self.bitboard.clear_cell(x, y)
+            else:
+                board[y][x] = 0
+        self.column_tops = list(tops)
+        return True
+        
+    def snapshot(self):
+        """Capture the game state as a compact GameState"""
+        return GameState(b''.join(map(bytes, self.board)), tuple(self.column_tops),
+                         self.shape_id, self.rotation, self.current_color, self.piece_x,
+                         self.piece_y, self.ghost_y, self.score, self.level, self.lines_cleared,
+                         self.game_over, self.pieces_spawned, self.rng_state, self.fall_time,
+                         self.ticks)
+        
+    def restore(self, state):
+        """Load a GameState from snapshot(); the undo history is discarded"""
+        packed = state.board
+        # Rows are replaced in place: the bitboard and renderer hold on to this list
+        self.board[:] = [list(packed[i:i + BOARD_WIDTH])
+                         for i in range(0, BOARD_WIDTH * self.height, BOARD_WIDTH)]
+        if self.bitboard:
+            self.bitboard.load_rows([int(packed[i:i + BOARD_WIDTH].translate(_OCCUPIED)[::-1], 2)
+                                     for i in range(0, BOARD_WIDTH * self.height, BOARD_WIDTH)])
+        self.column_tops = list(state.column_tops)
+        self.shape_id = state.shape_id
+        self.rotation = state.rotation
+        self.current_color = state.color
+        self.piece_x = state.piece_x
+        self.piece_y = state.piece_y
+        self.ghost_y = state.ghost_y
+        self.score = state.score
+        self.level = state.level
+        self.lines_cleared = state.lines_cleared
+        self.game_over = state.game_over
+        self.pieces_spawned = state.pieces_spawned
+        self.rng_state = state.rng_state
+        self.fall_time = state.fall_time
+        self.ticks = state.ticks
+        if self.undo_stack is not None:
+            self.undo_stack.clear()
+            
+    def clone(self):
+        """Return an independent headless copy of this game"""
+        game = Tetris.__new__(Tetris)
+        game.height = self.height
+        game.tick_rate = self.tick_rate
+        game.bitboard = BitBoard(BOARD_WIDTH, self.height) if self.bitboard else None
+        game.board = game.bitboard.cells if game.bitboard else []
+        game.undo_limit = self.undo_limit
+        game.undo_stack = deque(maxlen=self.undo_limit) if self.undo_limit else None
+        game.view_offset = self.view_offset
+        game.seed = self.seed
+        game.restore(self.snapshot())
+        return game
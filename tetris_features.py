@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# Vectorised board features for large candidate sets. Every placement of
+# the falling piece is written into one (n, rows, width) boolean array and
+# the usual evaluation features (heights, holes, bumpiness, row / column
+# transitions, wells) come out of a single NumPy pass over it.
+import argparse
+import time
+
+import numpy as np
+
+from tetris_engine import BOARD_WIDTH, Tetris
+from tetris_pieces import NUM_ROTATIONS, PIECES
+
+# Tallest piece; a window this far above the stack holds every placement
+MAX_PIECE_SIZE = 4
+# Most placements one piece can have: every rotation in every column
+MAX_PLACEMENTS = NUM_ROTATIONS * BOARD_WIDTH
+
+# Per-board scalar features returned by board_features (plus 'heights')
+FEATURES = ('aggregate_height', 'max_height', 'holes', 'bumpiness',
+            'row_transitions', 'column_transitions', 'wells')
+
+
+def placement_buffer(rows, capacity=MAX_PLACEMENTS, width=BOARD_WIDTH):
+    """Preallocate room for `capacity` candidate boards of rows x width cells"""
+    return np.zeros((capacity, rows, width), dtype=bool)
+
+
+def board_window(game):
+    """Return (top, occupancy array of game.board rows [top, height)) around the stack
+
+    Rows above the window are empty and every placement of the falling piece
+    lands inside it, so candidates only cost as much as the stack is tall.
+    """
+    top = max(game.stack_top - MAX_PIECE_SIZE, 0)
+    return top, np.array(game.board[top:], dtype=bool)
+
+
+def _placement_table(rotations, width):
+    """Every (rotation, x) of one shape as arrays: rotation, x, cell columns and cell rows"""
+    rotation_ids, xs, cell_x, cell_y = [], [], [], []
+    for piece in rotations:
+        dx, dy = zip(*piece.cells)
+        for x in range(width - piece.width + 1):
+            rotation_ids.append(piece.rotation)
+            xs.append(x)
+            cell_x.append([x + col for col in dx])
+            cell_y.append(dy)
+    return (np.array(rotation_ids), np.array(xs), np.array(cell_x), np.array(cell_y))
+
+
+# PLACEMENTS[shape_id] -> placement table for the standard board width
+PLACEMENTS = tuple(_placement_table(rotations, BOARD_WIDTH) for rotations in PIECES)
+
+
+def generate_placements(board, shape_id, x, y=0, rotation=0, out=None):
+    """Write every placement of a piece into `out`; return (count, rotations, xs, lines)
+
+    board is an (rows, width) occupancy array and (x, y, rotation) the
+    piece's current position. A placement is kept when each rotation step at
+    the current position and each sideways step at the current row is
+    collision free, like TetrisBot. Candidates are hard-dropped, their full
+    rows cleared, and the resulting boards written to out[:count].
+    """
+    rows, width = board.shape
+    if out is None:
+        out = placement_buffer(rows, width=width)
+    elif out.shape[1:] != board.shape:
+        raise ValueError(f"Buffer holds {out.shape[1:]} boards, not {board.shape}")
+    rotation_ids, xs, cell_x, cell_y = (PLACEMENTS[shape_id] if width == BOARD_WIDTH else
+                                        _placement_table(PIECES[shape_id], width))
+
+    # Which placements collide at the piece's current row (the floor counts as filled)
+    cell_rows = y + cell_y
+    blocked = ((cell_rows >= rows) |
+               board[np.minimum(cell_rows, rows - 1), cell_x]).any(axis=1)
+
+    # Rotation states reached by turning in place, each distinct layout once
+    offsets = np.searchsorted(rotation_ids, np.arange(NUM_ROTATIONS))
+    selected = np.zeros(NUM_ROTATIONS, dtype=bool)
+    seen = []
+    for turn in range(NUM_ROTATIONS):
+        state = (rotation + turn) % NUM_ROTATIONS
+        piece = PIECES[shape_id][state]
+        if x > width - piece.width or blocked[offsets[state] + x]:
+            break
+        if piece.grid not in seen:
+            seen.append(piece.grid)
+            selected[state] = True
+
+    # Sideways reach: no blocked placement between the start column and x
+    start = np.minimum(offsets[rotation_ids] + x, len(xs) - 1)
+    passed = np.cumsum(blocked)
+    between = np.where(xs >= x, passed - passed[start] + blocked[start],
+                       passed[start] - passed + blocked)
+    keep = np.flatnonzero(selected[rotation_ids] & (between == 0))
+    count = len(keep)
+    if count > len(out):
+        raise ValueError(f"Buffer holds {len(out)} boards, {count} placements needed")
+    rotation_ids, xs, cell_x, cell_y = rotation_ids[keep], xs[keep], cell_x[keep], cell_y[keep]
+
+    # Landing row from the column surfaces (rows when a column is empty)
+    tops = np.where(board.any(axis=0), board.argmax(axis=0), rows)
+    landings = (tops[cell_x] - 1 - cell_y).min(axis=1)
+    for i in np.flatnonzero(landings < y):
+        # Tucked under an overhang: the surface is above the piece, so step down
+        drop = y
+        while drop + 1 + cell_y[i].max() < rows and not board[drop + 1 + cell_y[i], cell_x[i]].any():
+            drop += 1
+        landings[i] = drop
+
+    # Copy the board once per candidate, then stamp every piece in one go
+    boards = out[:count]
+    boards[:] = board
+    boards[np.arange(count)[:, None], landings[:, None] + cell_y, cell_x] = True
+
+    # Line clears: a stable sort moves full rows to the top, which are then emptied
+    full = boards.all(axis=2)
+    lines = full.sum(axis=1)
+    clearing = np.flatnonzero(lines)
+    if len(clearing):
+        order = np.argsort(~full[clearing], axis=1, kind='stable')
+        compacted = np.take_along_axis(boards[clearing], order[:, :, None], axis=1)
+        compacted[np.arange(rows) < lines[clearing, None]] = False
+        boards[clearing] = compacted
+    return count, rotation_ids, xs, lines
+
+
+def game_placements(game, out=None):
+    """Placements of the game's falling piece; return (top, boards, rotations, xs, lines)
+
+    boards is a view of `out` holding rows [top, height) of each candidate.
+    """
+    top, board = board_window(game)
+    if out is None:
+        out = placement_buffer(board.shape[0], width=board.shape[1])
+    elif out.shape[1] < board.shape[0]:
+        raise ValueError(f"Buffer holds {out.shape[1]} rows, the stack needs {board.shape[0]}")
+    else:
+        # Tall buffers are filled from the bottom, so they fit any shorter window
+        out = out[:, out.shape[1] - board.shape[0]:]
+    # Above the window every row is empty, so the piece may start at its top
+    start_y = max(game.piece_y - top, 0)
+    count, rotations, xs, lines = generate_placements(board, game.shape_id, game.piece_x, start_y,
+                                                      game.rotation, out)
+    return top, out[:count], rotations, xs, lines
+
+
+def board_features(boards):
+    """Evaluation features of a stack of (n, rows, width) boolean boards in one pass
+
+    Returns a dict of arrays: 'heights' (n, width) plus one value per board
+    for each name in FEATURES. The walls and floor count as filled for
+    transitions and wells; a well cell is an open cell with filled cells on
+    both sides, and a well of depth d adds 1 + 2 + ... + d.
+    """
+    boards = np.asarray(boards, dtype=bool)
+    # Cells at or below the highest filled cell of their column
+    covered = np.logical_or.accumulate(boards, axis=1)
+    heights = covered.sum(axis=1)
+    holes = heights.sum(axis=1) - boards.sum(axis=(1, 2))
+
+    # Left and right walls are filled, so an open edge cell adds a transition
+    row_transitions = ((boards[:, :, 1:] != boards[:, :, :-1]).sum(axis=(1, 2)) +
+                       (~boards[:, :, 0]).sum(axis=1) + (~boards[:, :, -1]).sum(axis=1))
+    column_transitions = ((boards[:, 1:] != boards[:, :-1]).sum(axis=(1, 2)) +
+                          (~boards[:, -1]).sum(axis=1))
+
+    # Open cells with filled neighbours (or walls) on both sides
+    well = ~covered
+    well[:, :, 1:] &= boards[:, :, :-1]
+    well[:, :, :-1] &= boards[:, :, 1:]
+    # Depth of each well cell within its run, counted from the top of the run
+    run = np.cumsum(well, axis=1, dtype=np.int32)
+    run -= np.maximum.accumulate(np.where(well, 0, run), axis=1)
+    return {
+        'heights': heights,
+        'aggregate_height': heights.sum(axis=1),
+        'max_height': heights.max(axis=1),
+        'holes': holes,
+        'bumpiness': np.abs(np.diff(heights, axis=1)).sum(axis=1),
+        'row_transitions': row_transitions,
+        'column_transitions': column_transitions,
+        'wells': run.sum(axis=(1, 2)),
+    }
+
+
+def run_benchmark(positions=2000, seed=0):
+    """Generate and score every placement for `positions` game positions; return throughput numbers"""
+    game = Tetris(seed=seed)
+    rng = np.random.default_rng(seed)
+    out = placement_buffer(game.height)
+    candidates = 0
+    start = time.perf_counter()
+    for _ in range(positions):
+        if game.game_over:
+            game.reset()
+        _, boards, rotations, xs, lines = game_placements(game, out)
+        board_features(boards)
+        candidates += len(boards)
+        # Play a random placement so the next position differs
+        if len(xs):
+            choice = rng.integers(len(xs))
+            game.rotation = rotations[choice]
+            game.piece_x = xs[choice]
+        game.hard_drop()
+    elapsed = time.perf_counter() - start
+    return {
+        'positions': positions,
+        'candidates': candidates,
+        'seconds': elapsed,
+        'candidates_per_second': candidates / elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark vectorised placement generation and scoring')
+    parser.add_argument('--positions', type=int, default=2000, help='game positions to expand')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the piece sequence')
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.positions, args.seed)
+    print(f"Generated and scored {result['candidates']} candidates in {result['seconds']:.2f}s "
+          f"({result['candidates_per_second']:.0f} candidates/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# Fingertip smoothing and control-zone lookup for the gesture controller.
+# Pure Python (no OpenCV / MediaPipe) so layouts and filters can be tuned
+# and replayed offline.
+import math
+
+# Smoothing stages understood by FingertipFilter
+SMOOTHING_MODES = ('none', 'one_euro', 'kalman')
+
+
+class OneEuroFilter:
+    def __init__(self, min_cutoff=1.0, beta=0.02, d_cutoff=1.0):
+        """Speed-adaptive low-pass filter: smooth when still, responsive when moving"""
+        self.min_cutoff = min_cutoff  # Hz, cutoff when the finger is still
+        self.beta = beta              # Cutoff increase per unit of speed
+        self.d_cutoff = d_cutoff      # Hz, cutoff for the velocity estimate
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.velocity = 0.0
+        self.last_time = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, value, timestamp):
+        """Filter one sample; return (position, velocity per second)"""
+        if self.last_time is None:
+            self.value = value
+            self.last_time = timestamp
+            return self.value, self.velocity
+        dt = timestamp - self.last_time
+        if dt <= 0:
+            return self.value, self.velocity
+        self.last_time = timestamp
+        raw_velocity = (value - self.value) / dt
+        self.velocity += self._alpha(self.d_cutoff, dt) * (raw_velocity - self.velocity)
+        cutoff = self.min_cutoff + self.beta * abs(self.velocity)
+        self.value += self._alpha(cutoff, dt) * (value - self.value)
+        return self.value, self.velocity
+
+
+class KalmanFilter:
+    def __init__(self, acceleration_noise=3000.0, measurement_noise=4.0):
+        """Constant-velocity Kalman filter for one axis"""
+        self.q = acceleration_noise ** 2  # Variance of the unmodelled acceleration
+        self.r = measurement_noise ** 2   # Variance of a landmark measurement
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.velocity = 0.0
+        self.last_time = None
+        # Covariance of (position, velocity)
+        self.p00 = self.p01 = self.p11 = 0.0
+
+    def update(self, value, timestamp):
+        """Filter one sample; return (position, velocity per second)"""
+        if self.last_time is None:
+            self.value = value
+            self.last_time = timestamp
+            self.p00, self.p01, self.p11 = self.r, 0.0, self.q
+            return self.value, self.velocity
+        dt = timestamp - self.last_time
+        if dt <= 0:
+            return self.value, self.velocity
+        self.last_time = timestamp
+
+        # Predict
+        self.value += self.velocity * dt
+        q = self.q
+        p00 = self.p00 + dt * (2 * self.p01 + dt * self.p11) + q * dt ** 4 / 4
+        p01 = self.p01 + dt * self.p11 + q * dt ** 3 / 2
+        p11 = self.p11 + q * dt ** 2
+
+        # Correct with the measured position
+        s = p00 + self.r
+        k0 = p00 / s
+        k1 = p01 / s
+        residual = value - self.value
+        self.value += k0 * residual
+        self.velocity += k1 * residual
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+        return self.value, self.velocity
+
+
+class FingertipFilter:
+    def __init__(self, mode='one_euro', **params):
+        """Smooth (x, y) fingertip samples and estimate their velocity"""
+        if mode not in SMOOTHING_MODES:
+            raise ValueError(f"Unknown smoothing mode: {mode}")
+        self.mode = mode
+        if mode == 'one_euro':
+            self.axes = (OneEuroFilter(**params), OneEuroFilter(**params))
+        elif mode == 'kalman':
+            self.axes = (KalmanFilter(**params), KalmanFilter(**params))
+        else:
+            self.axes = None
+
+    def update(self, x, y, timestamp):
+        """Return the smoothed (x, y, vx, vy); velocity is 0 without smoothing"""
+        if self.axes is None:
+            return x, y, 0.0, 0.0
+        x, vx = self.axes[0].update(x, timestamp)
+        y, vy = self.axes[1].update(y, timestamp)
+        return x, y, vx, vy
+
+    def reset(self):
+        """Forget the track, e.g. when the hand is lost"""
+        for axis in self.axes or ():
+            axis.reset()
+
+
+class ZoneLayout:
+    """Named rectangular control zones as (x0, y0, x1, y1) in pixels; the first match wins"""
+
+    def __init__(self, zones):
+        self.zones = [(name, tuple(rect)) for name, rect in zones]
+        self.rects = dict(self.zones)
+
+    @classmethod
+    def grid(cls, columns, rows, cells, width, height):
+        """Layout from {name: (column, row)} cells of a columns x rows grid"""
+        zone_width = width // columns
+        zone_height = height // rows
+        return cls([(name, (col * zone_width, row * zone_height,
+                            (col + 1) * zone_width, (row + 1) * zone_height))
+                    for name, (col, row) in cells.items()])
+
+    def depth(self, name, x, y):
+        """Distance from (x, y) to the nearest edge of a zone, negative outside it"""
+        x0, y0, x1, y1 = self.rects[name]
+        return min(x - x0, x1 - x, y - y0, y1 - y)
+
+    def zone_at(self, x, y, current=None, hysteresis=0):
+        """Name of the zone containing (x, y), or None
+
+        The current zone is kept until the point is more than `hysteresis`
+        pixels outside it, so jitter on a border does not flip zones.
+        """
+        if current in self.rects and self.depth(current, x, y) >= -hysteresis:
+            return current
+        for name, (x0, y0, x1, y1) in self.zones:
+            if x0 <= x < x1 and y0 <= y < y1:
+                return name
+        return None
+
+
+class ZoneTracker:
+    """Zone state of one fingertip: smoothing, hysteresis, dwell time and early activation"""
+
+    # Time needed in a zone to trigger its action
+    ACTIVATION_DELAY = 0.1
+    # Delay between repeated actions (in seconds) for smooth control
+    ACTION_DELAYS = {
+        'LEFT': 0.15,      # Quick side movement
+        'RIGHT': 0.15,     # Quick side movement
+        'ROTATE': 0.3,     # Slower rotation to prevent spin
+        'DOWN': 0.1        # Fast dropping
+    }
+    # Min fingertip speed in px/s for early activation
+    EARLY_SPEED = 500
+
+    def __init__(self, layout, smoothing='one_euro', hysteresis=12, prediction_lead=0.08):
+        self.layout = layout
+        self.filter = FingertipFilter(smoothing)
+        self.hysteresis = hysteresis            # Pixels the finger must leave a zone by to switch
+        self.prediction_lead = prediction_lead  # Seconds of motion extrapolated for early activation (0 = off)
+        self.previous_zone = None
+        self.zone_entry_time = None
+        # Action whose zone the fingertip currently holds (past ACTIVATION_DELAY), or None
+        self.held_action = None
+        self.last_action_time = dict.fromkeys(self.ACTION_DELAYS, float('-inf'))
+        self.early_activations = 0
+
+    def current_zone(self, x, y):
+        """Name of the control zone under the finger (sticky within the hysteresis band), or None"""
+        return self.layout.zone_at(x, y, self.previous_zone, self.hysteresis)
+
+    def predicted_zone(self, x, y, velocity_x, velocity_y):
+        """Action zone the finger is clearly heading into, or None"""
+        if not self.prediction_lead or math.hypot(velocity_x, velocity_y) < self.EARLY_SPEED:
+            return None
+        ahead_x = x + velocity_x * self.prediction_lead
+        ahead_y = y + velocity_y * self.prediction_lead
+        zone = self.layout.zone_at(ahead_x, ahead_y)
+        # Only trust predictions that land well inside an action zone
+        if zone not in self.ACTION_DELAYS or self.layout.depth(zone, ahead_x, ahead_y) < self.hysteresis:
+            return None
+        return zone
+
+    def can_perform_action(self, action, timestamp):
+        """Check if enough time has passed to perform the action again"""
+        if timestamp - self.last_action_time[action] >= self.ACTION_DELAYS[action]:
+            self.last_action_time[action] = timestamp
+            return True
+        return False
+
+    def update(self, x, y, timestamp):
+        """Feed one fingertip sample in pixels; return (smoothed x, smoothed y, fired action or None)"""
+        x, y, velocity_x, velocity_y = self.filter.update(x, y, timestamp)
+
+        # Get current control zone, or the one a fast move is about to reach
+        zone = self.current_zone(x, y)
+        predicted = self.predicted_zone(x, y, velocity_x, velocity_y)
+        if predicted is not None and predicted != self.previous_zone:
+            zone = predicted
+
+        # Handle zone transitions
+        if zone != self.previous_zone:
+            self.zone_entry_time = timestamp
+            self.previous_zone = zone
+            if zone == predicted:
+                # The motion already shows intent, so skip the dwell time
+                self.zone_entry_time -= self.ACTIVATION_DELAY
+                self.early_activations += 1
+
+        # Check for valid control actions
+        self.held_action = None
+        fired = None
+        if zone in self.ACTION_DELAYS and timestamp - self.zone_entry_time >= self.ACTIVATION_DELAY:
+            self.held_action = zone
+            if self.can_perform_action(zone, timestamp):
+                fired = zone
+        return x, y, fired
+
+    def lost(self):
+        """The hand left the frame: release the held action and forget the track"""
+        self.filter.reset()
+        self.held_action = None
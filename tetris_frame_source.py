@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# Frame sources for the gesture pipeline: live camera, recorded video and
+# memory-mapped raw frame dumps, all with the cv2.VideoCapture read() API.
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameSource:
+    """Base class: read() returns (success, frame) like cv2.VideoCapture"""
+
+    def __init__(self, fps=None, realtime=False, loop=False):
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        self.finished = False
+        self.frames_read = 0
+        self._start_time = None
+
+    def _pace(self):
+        """Sleep until the next frame is due when replaying at recorded speed"""
+        if not self.realtime or not self.fps:
+            return
+        now = time.monotonic()
+        if self._start_time is None:
+            self._start_time = now
+        due = self._start_time + self.frames_read / self.fps
+        if due > now:
+            time.sleep(due - now)
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        """Free the underlying resources"""
+        self.finished = True
+
+
+class CameraSource(FrameSource):
+    """Live webcam capture"""
+
+    def __init__(self, index=0):
+        super().__init__()
+        self.capture = cv2.VideoCapture(index)
+
+    def read(self):
+        return self.capture.read()
+
+    def release(self):
+        super().release()
+        self.capture.release()
+
+
+class VideoFileSource(FrameSource):
+    """Recorded video replayed at its recorded speed or as fast as it decodes"""
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise IOError(f"Cannot open video file: {path}")
+        super().__init__(fps=self.capture.get(cv2.CAP_PROP_FPS) or 30, realtime=realtime, loop=loop)
+
+    def read(self):
+        if self.finished:
+            return False, None
+        self._pace()
+        success, frame = self.capture.read()
+        if not success and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.capture.read()
+        if not success:
+            self.finished = True
+            return False, None
+        self.frames_read += 1
+        return True, frame
+
+    def release(self):
+        super().release()
+        self.capture.release()
+
+
+class MemmapFrameSource(FrameSource):
+    """Raw (N, H, W, 3) uint8 BGR frames from a .npy dump, handed out as zero-copy views"""
+
+    def __init__(self, path, fps=30, realtime=False, loop=False):
+        super().__init__(fps=fps, realtime=realtime, loop=loop)
+        self.frames = np.load(path, mmap_mode='r')
+        self.index = 0
+
+    def read(self):
+        if self.frames is None:
+            # Released: behave like the other sources and report no more frames
+            self.finished = True
+            return False, None
+        if self.index >= len(self.frames):
+            if not self.loop or not len(self.frames):
+                self.finished = True
+                return False, None
+            self.index = 0
+        self._pace()
+        frame = self.frames[self.index]
+        self.index += 1
+        self.frames_read += 1
+        return True, frame
+
+    def release(self):
+        super().release()
+        self.frames = None
+
+
+def open_frame_source(spec, realtime=True, loop=False):
+    """Open a camera index ("0"), a .npy frame dump or a video file"""
+    if isinstance(spec, int) or str(spec).isdigit():
+        return CameraSource(int(spec))
+    if str(spec).lower().endswith('.npy'):
+        return MemmapFrameSource(spec, realtime=realtime, loop=loop)
+    return VideoFileSource(spec, realtime=realtime, loop=loop)
+
+
+def dump_frames(source, path, max_frames):
+    """Copy up to max_frames frames from a source into a .npy dump; return the count"""
+    frames = []
+    while len(frames) < max_frames:
+        success, frame = source.read()
+        if not success:
+            break
+        frames.append(np.array(frame))
+    if frames:
+        np.save(path, np.stack(frames))
+    return len(frames)
@@ -1,11 +1,21 @@
+import argparse
 import cv2
 import mediapipe as mp
 import numpy as np
 import pygame
 import time
+from tetris_fingertip import SMOOTHING_MODES, ZoneLayout, ZoneTracker
+from tetris_frame_source import CameraSource, open_frame_source
 
 class HandGestureController:
-    def __init__(self):
+    # Where the annotated camera feed goes: its own OpenCV window, handed to
+    # the game window through preview_frame, or nowhere
+    PREVIEW_MODES = ('window', 'embed', 'off')
+    
+    def __init__(self, metrics=None, frame_source=None, adaptive=False,
+                 inference_scale=1.0, detect_interval=3, roi_margin=0.4,
+                 preview='window', preview_interval=1, smoothing='one_euro',
+                 hysteresis=12, prediction_lead=0.08, zone_layout=None):
         # Initialize MediaPipe hand tracking
         self.mediapipe_hands = mp.solutions.hands
         self.hand_detector = self.mediapipe_hands.Hands(
@@ -16,8 +26,8 @@ class HandGestureController:
         )
         self.hand_drawer = mp.solutions.drawing_utils
         
-        # Initialize webcam capture
-        self.webcam = cv2.VideoCapture(0)
+        # Frame input: live webcam unless a recorded source is supplied
+        self.frame_source = frame_source if frame_source is not None else CameraSource(0)
         
         # Define webcam window dimensions
         self.WINDOW_WIDTH = 640
@@ -37,138 +47,260 @@ class HandGestureController:
             'DOWN': (1, 2),    # Middle column, bottom row
             'NEUTRAL': (1, 1)  # Middle column, middle row (safe zone)
         }
+        # Zones as pixel rectangles; any ZoneLayout can replace the 3x3 grid
+        self.zone_layout = zone_layout or ZoneLayout.grid(self.GRID_COLUMNS, self.GRID_ROWS,
+                                                          self.CONTROL_ZONES,
+                                                          self.WINDOW_WIDTH, self.WINDOW_HEIGHT)
         
-        # Time tracking for each command to prevent rapid-fire
-        self.last_action_time = {
-            'LEFT': 0,
-            'RIGHT': 0,
-            'ROTATE': 0,
-            'DOWN': 0
-        }
-        
-        # Delay between actions (in seconds) for smooth control
-        self.ACTION_DELAYS = {
-            'LEFT': 0.15,      # Quick side movement
-            'RIGHT': 0.15,     # Quick side movement
-            'ROTATE': 0.3,     # Slower rotation to prevent spin
-            'DOWN': 0.1        # Fast dropping
-        }
+        # Fingertip smoothing, zone switching and action timing
+        self.zones = ZoneTracker(self.zone_layout, smoothing=smoothing, hysteresis=hysteresis,
+                                 prediction_lead=prediction_lead)
+        # Action whose zone the fingertip currently holds (past the activation delay), or None
+        self.held_action = None
         
-        # Timing for zone activation
-        self.zone_entry_timestamp = 0
-        self.ACTIVATION_DELAY = 0.1  # Time needed in zone to trigger action
+        # Monotonic timestamp of the most recent successful frame capture
+        self.last_capture_time = None
         
-        # Track finger position
-        self.previous_zone = None
-        self.zone_entry_time = None
+        # Optional LatencyRecorder that receives per-stage timings
+        self.metrics = metrics
         
-    def get_current_zone(self, finger_x, finger_y):
-        """Convert finger coordinates to grid zone position"""
-        grid_x = finger_x // self.zone_width
-        grid_y = finger_y // self.zone_height
-        return (grid_x, grid_y)
+        # Camera preview: with 'embed' the game window draws the overlay itself,
+        # so frames are published untouched as (image, fingertip pixel or None, held action)
+        if preview not in self.PREVIEW_MODES:
+            raise ValueError(f"Unknown preview mode: {preview}")
+        self.preview = preview
+        self.preview_interval = max(1, preview_interval)  # Publish every Nth frame
+        self.preview_frame = None
+        self.frames_processed = 0
         
-    def can_perform_action(self, action_type):
-        """Check if enough time has passed to perform action again"""
-        current_time = time.time()
-        if current_time - self.last_action_time[action_type] >= self.ACTION_DELAYS[action_type]:
-            self.last_action_time[action_type] = current_time
-            return True
-        return False
+        # Adaptive inference: run MediaPipe on a crop around the last hand
+        # (full frame only when the hand is lost), optionally downscaled, and
+        # follow the fingertip with optical flow between model runs
+        self.adaptive = adaptive
+        self.inference_scale = inference_scale  # Resize factor for images fed to MediaPipe
+        self.detect_interval = detect_interval  # Run MediaPipe at least every Nth frame
+        self.roi_margin = roi_margin            # Crop padding, as a fraction of the hand size
+        self.MIN_ROI_SIZE = 96                  # Smallest crop side in pixels
+        self.TRACK_ERROR_LIMIT = 2.0            # Max forward-backward flow error in pixels
+        self.LK_PARAMS = dict(winSize=(21, 21), maxLevel=3,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+        self.hand_box = None                    # (x0, y0, x1, y1) around the last hand, in pixels
+        self.tracked_point = None               # Fingertip position in pixels of the last frame
+        self.previous_gray = None
+        self.frames_since_detection = 0
+        self.model_runs = 0
+        self.tracked_frames = 0
         
     def get_finger_position(self):
         """Main method to process webcam input and return control commands"""
         # Capture webcam frame
-        success, camera_image = self.webcam.read()
+        stage_start = time.perf_counter()
+        success, camera_image = self.frame_source.read()
         if not success:
             return None
+        self.last_capture_time = time.monotonic()
+        capture_done = time.perf_counter()
         
         # Mirror image for intuitive controls
         camera_image = cv2.flip(camera_image, 1)
+        # MediaPipe takes RGB; the BGR frame is kept for the overlay and preview
         rgb_image = cv2.cvtColor(camera_image, cv2.COLOR_BGR2RGB)
-        hand_tracking_results = self.hand_detector.process(rgb_image)
+        preprocess_done = time.perf_counter()
+        hand_landmark_list, fingertip = self._locate_fingertip(rgb_image)
+        inference_done = time.perf_counter()
+        self.frames_processed += 1
         
-        # Draw control grid
-        self._draw_control_grid(camera_image)
-        
-        # Draw zone labels
-        self._draw_zone_labels(camera_image)
+        # Annotations are only drawn into the frame for the OpenCV window
+        annotate = self.preview == 'window'
+        if annotate:
+            # Draw control grid
+            self._draw_control_grid(camera_image)
+            
+            # Draw zone labels
+            self._draw_zone_labels(camera_image)
         
         current_action = None
-        current_time = time.time()
-        
-        # Process hand landmarks if detected
-        if hand_tracking_results.multi_hand_landmarks:
-            for hand_landmarks in hand_tracking_results.multi_hand_landmarks:
-                # Visualize hand landmarks
-                self.hand_drawer.draw_landmarks(
-                    camera_image, 
-                    hand_landmarks, 
-                    self.mediapipe_hands.HAND_CONNECTIONS
-                )
-                
-                # Get index fingertip position
-                fingertip = hand_landmarks.landmark[8]  # Index fingertip landmark
-                finger_x = int(fingertip.x * self.WINDOW_WIDTH)
-                finger_y = int(fingertip.y * self.WINDOW_HEIGHT)
-                
-                # Show fingertip position
-                self._draw_fingertip_marker(camera_image, finger_x, finger_y)
-                
-                # Get current control zone
-                current_zone = self.get_current_zone(finger_x, finger_y)
-                
-                # Handle zone transitions
-                if current_zone != self.previous_zone:
-                    self.zone_entry_time = current_time
-                    self.previous_zone = current_zone
-                
-                # Check for valid control actions
-                if self.zone_entry_time is not None:
-                    time_in_zone = current_time - self.zone_entry_time
-                    
-                    # Check all control zones
-                    for action, zone in self.CONTROL_ZONES.items():
-                        if current_zone == zone and action != 'NEUTRAL':
-                            if (time_in_zone >= self.ACTIVATION_DELAY and 
-                                self.can_perform_action(action)):
-                                current_action = action
-                                # Visual feedback for action
-                                cv2.circle(camera_image, (finger_x, finger_y), 
-                                         15, (0, 0, 255), 2)
+        # Zone timing follows the capture clock, so replayed footage behaves like live input
+        current_time = self.last_capture_time
+        
+        # Visualize hand landmarks (only on frames where MediaPipe ran)
+        for hand_landmarks in hand_landmark_list if annotate else ():
+            self.hand_drawer.draw_landmarks(
+                camera_image, 
+                hand_landmarks, 
+                self.mediapipe_hands.HAND_CONNECTIONS
+            )
+        
+        # Process index fingertip position if detected
+        finger_point = None
+        if fingertip is None:
+            self.zones.lost()
+        else:
+            # Smoothed position on the capture clock, plus the action it fires (if any)
+            finger_x, finger_y, current_action = self.zones.update(
+                fingertip[0] * self.WINDOW_WIDTH, fingertip[1] * self.WINDOW_HEIGHT, current_time)
+            finger_point = (int(finger_x), int(finger_y))
+            
+            # Show fingertip position
+            if annotate:
+                self._draw_fingertip_marker(camera_image, *finger_point)
+                if current_action:
+                    # Visual feedback for action
+                    cv2.circle(camera_image, finger_point, 15, (0, 0, 255), 2)
+        held_action = self.held_action = self.zones.held_action
         
         # Show current action on screen
-        if current_action:
+        if current_action and annotate:
             cv2.putText(camera_image, f"Action: {current_action}", 
                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
         
+        overlay_done = time.perf_counter()
+        
         # Display webcam feed
-        cv2.imshow('Hand Gesture Controls', camera_image)
-        cv2.waitKey(1)
+        if annotate:
+            cv2.imshow('Hand Gesture Controls', camera_image)
+            cv2.waitKey(1)
+        elif self.preview == 'embed' and self.frames_processed % self.preview_interval == 0:
+            # A fresh array every frame, so the game thread can read it without copying
+            self.preview_frame = (camera_image, finger_point, held_action)
+        
+        if self.metrics is not None:
+            display_done = time.perf_counter()
+            self.metrics.record('capture', capture_done - stage_start)
+            self.metrics.record('preprocess', preprocess_done - capture_done)
+            self.metrics.record('inference', inference_done - preprocess_done)
+            self.metrics.record('overlay', overlay_done - inference_done)
+            self.metrics.record('display', display_done - overlay_done)
         
         return current_action
     
+    def warm_up(self):
+        """Run the hand model once on a blank frame so the first real frame is not slow"""
+        blank_image = np.zeros((self.WINDOW_HEIGHT, self.WINDOW_WIDTH, 3), dtype=np.uint8)
+        self.hand_detector.process(blank_image)
+    
+    def poll(self):
+        """Process one frame and return (capture_time, held action or None), or None if no frame"""
+        previous_capture = self.last_capture_time
+        self.get_finger_position()
+        if self.last_capture_time == previous_capture:
+            return None
+        return self.last_capture_time, self.held_action
+    
+    def _locate_fingertip(self, image):
+        """Return (landmarks of hands found by MediaPipe in an RGB image, normalized index fingertip or None)"""
+        if not self.adaptive:
+            hand_landmark_list = self._run_hand_model(image, None)
+            return hand_landmark_list, self._fingertip(hand_landmark_list)
+        
+        height, width = image.shape[:2]
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        hand_landmark_list = []
+        point = None
+        if self.tracked_point is not None and self.frames_since_detection < self.detect_interval:
+            point = self._track_point(gray)
+        if point is not None:
+            # Cheap frame: move the crop along with the tracked fingertip
+            dx = point[0] - self.tracked_point[0]
+            dy = point[1] - self.tracked_point[1]
+            x0, y0, x1, y1 = self.hand_box
+            self.hand_box = self._clamp_box(x0 + dx, y0 + dy, x1 + dx, y1 + dy, width, height)
+            self.frames_since_detection += 1
+            self.tracked_frames += 1
+        else:
+            hand_landmark_list = self._run_hand_model(image, self.hand_box)
+            fingertip = self._fingertip(hand_landmark_list)
+            if fingertip is None:
+                # Hand lost: the next model run searches the full frame
+                self.hand_box = None
+            else:
+                self.hand_box = self._hand_box(hand_landmark_list[0], width, height)
+                point = (fingertip[0] * width, fingertip[1] * height)
+            self.frames_since_detection = 0
+        self.tracked_point = point
+        self.previous_gray = gray
+        if point is None:
+            return hand_landmark_list, None
+        return hand_landmark_list, (point[0] / width, point[1] / height)
+    
+    def _run_hand_model(self, image, box):
+        """Run MediaPipe on the whole RGB image or a pixel box of it; landmarks are full-frame normalized"""
+        region = image if box is None else image[box[1]:box[3], box[0]:box[2]]
+        if self.inference_scale != 1.0:
+            region = cv2.resize(region, None, fx=self.inference_scale, fy=self.inference_scale,
+                                interpolation=cv2.INTER_AREA)
+        # A crop is a strided view; MediaPipe needs contiguous pixels (a no-op for full frames)
+        hand_tracking_results = self.hand_detector.process(np.ascontiguousarray(region))
+        self.model_runs += 1
+        hand_landmark_list = hand_tracking_results.multi_hand_landmarks or []
+        if box is not None:
+            # Map crop-relative coordinates back onto the full frame
+            height, width = image.shape[:2]
+            x0, y0, x1, y1 = box
+            for hand_landmarks in hand_landmark_list:
+                for landmark in hand_landmarks.landmark:
+                    landmark.x = (x0 + landmark.x * (x1 - x0)) / width
+                    landmark.y = (y0 + landmark.y * (y1 - y0)) / height
+        return hand_landmark_list
+    
+    def _fingertip(self, hand_landmark_list):
+        """Normalized (x, y) of the first hand's index fingertip, or None"""
+        if not hand_landmark_list:
+            return None
+        fingertip = hand_landmark_list[0].landmark[8]  # Index fingertip landmark
+        return (fingertip.x, fingertip.y)
+    
+    def _hand_box(self, hand_landmarks, width, height):
+        """Padded pixel box around a hand's landmarks"""
+        xs = [landmark.x * width for landmark in hand_landmarks.landmark]
+        ys = [landmark.y * height for landmark in hand_landmarks.landmark]
+        size = max(max(xs) - min(xs), max(ys) - min(ys), self.MIN_ROI_SIZE)
+        pad = size * self.roi_margin
+        center_x = (max(xs) + min(xs)) / 2
+        center_y = (max(ys) + min(ys)) / 2
+        half = size / 2 + pad
+        return self._clamp_box(center_x - half, center_y - half, center_x + half, center_y + half,
+                               width, height)
+    
+    def _clamp_box(self, x0, y0, x1, y1, width, height):
+        """Round a box to integer pixels inside the frame"""
+        x0 = max(0, min(int(x0), width - 1))
+        y0 = max(0, min(int(y0), height - 1))
+        x1 = max(x0 + 1, min(int(x1), width))
+        y1 = max(y0 + 1, min(int(y1), height))
+        return (x0, y0, x1, y1)
+    
+    def _track_point(self, gray):
+        """Follow the fingertip with Lucas-Kanade flow; None when tracking is unreliable"""
+        previous_point = np.array([[self.tracked_point]], dtype=np.float32)
+        point, status, _ = cv2.calcOpticalFlowPyrLK(
+            self.previous_gray, gray, previous_point, None, **self.LK_PARAMS)
+        if point is None or not status[0][0]:
+            return None
+        # Forward-backward check: tracking back should land where we started
+        back_point, back_status, _ = cv2.calcOpticalFlowPyrLK(
+            gray, self.previous_gray, point, None, **self.LK_PARAMS)
+        if back_point is None or not back_status[0][0]:
+            return None
+        if np.linalg.norm(back_point - previous_point) > self.TRACK_ERROR_LIMIT:
+            return None
+        x, y = point[0][0]
+        height, width = gray.shape
+        if not (0 <= x < width and 0 <= y < height):
+            return None
+        return (float(x), float(y))
+    
     def _draw_control_grid(self, image):
-        """Draw the 3x3 control grid"""
-        # Vertical lines
-        for i in range(1, self.GRID_COLUMNS):
-            cv2.line(image, 
-                    (i * self.zone_width, 0), 
-                    (i * self.zone_width, self.WINDOW_HEIGHT), 
-                    (255, 255, 255), 2)
-        # Horizontal lines
-        for i in range(1, self.GRID_ROWS):
-            cv2.line(image, 
-                    (0, i * self.zone_height), 
-                    (self.WINDOW_WIDTH, i * self.zone_height), 
-                    (255, 255, 255), 2)
+        """Draw the outline of every control zone"""
+        for _, (x0, y0, x1, y1) in self.zone_layout.zones:
+            cv2.rectangle(image, (x0, y0), (x1, y1), (255, 255, 255), 2)
     
     def _draw_zone_labels(self, image):
         """Draw labels for each control zone"""
         font = cv2.FONT_HERSHEY_SIMPLEX
-        for action, (col, row) in self.CONTROL_ZONES.items():
-            x = col * self.zone_width + self.zone_width // 2 - 30
-            y = row * self.zone_height + self.zone_height // 2
+        for action, (x0, y0, x1, y1) in self.zone_layout.zones:
+            x = (x0 + x1) // 2 - 30
+            y = (y0 + y1) // 2
             cv2.putText(image, action, (x, y), font, 1, (255, 255, 0), 2)
     
     def _draw_fingertip_marker(self, image, x, y):
@@ -177,15 +309,40 @@ class HandGestureController:
     
     def cleanup(self):
         """Release webcam and close windows"""
-        self.webcam.release()
+        self.frame_source.release()
         cv2.destroyAllWindows()
 
 # Test the gesture controller independently
-def main():
-    controller = HandGestureController()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the hand gesture controller on its own')
+    parser.add_argument('--source', default='0',
+                        help='camera index, video file or .npy frame dump (default: camera 0)')
+    parser.add_argument('--fast', action='store_true',
+                        help='replay recorded sources as fast as possible instead of at recorded speed')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='crop inference around the hand and track the fingertip between model runs')
+    parser.add_argument('--inference-scale', type=float, default=1.0,
+                        help='resize factor for images passed to MediaPipe')
+    parser.add_argument('--detect-interval', type=int, default=3,
+                        help='with --adaptive, run MediaPipe at least every N frames')
+    parser.add_argument('--smoothing', choices=SMOOTHING_MODES, default='one_euro',
+                        help='fingertip smoothing filter')
+    parser.add_argument('--prediction-lead', type=float, default=0.08,
+                        help='seconds of fingertip motion extrapolated for early zone activation (0 = off)')
+    parser.add_argument('--preview', choices=['window', 'off'], default='window',
+                        help='show the annotated camera window, or skip it to time the pipeline alone')
+    args = parser.parse_args(argv)
+    
+    frame_source = open_frame_source(args.source, realtime=not args.fast)
+    controller = HandGestureController(frame_source=frame_source, adaptive=args.adaptive,
+                                       inference_scale=args.inference_scale,
+                                       detect_interval=args.detect_interval,
+                                       preview=args.preview, smoothing=args.smoothing,
+                                       prediction_lead=args.prediction_lead)
+    start_time = time.perf_counter()
     
     try:
-        while True:
+        while not frame_source.finished:
             action = controller.get_finger_position()
             if action:
                 print(f"Detected gesture: {action}")
@@ -195,6 +352,14 @@ def main():
                 
     finally:
         controller.cleanup()
+        elapsed = time.perf_counter() - start_time
+        if frame_source.frames_read and elapsed > 0:
+            # Throughput of the whole pipeline for recorded sources
+            print(f"Processed {frame_source.frames_read} frames in {elapsed:.2f}s "
+                  f"({frame_source.frames_read / elapsed:.1f} FPS)")
+            print(f"MediaPipe runs: {controller.model_runs}, "
+                  f"optical-flow frames: {controller.tracked_frames}, "
+                  f"early activations: {controller.zones.early_activations}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
\ No newline at end of file
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Background thread that runs the gesture controller off the game loop.
+# Deliberately free of cv2 / mediapipe imports: the controller can be built
+# on the worker thread, so the game window opens before the vision stack
+# has finished loading.
+import threading
+import time
+from collections import deque
+
+
+class GestureWorker:
+    """Runs a HandGestureController on a background thread.
+
+    Every processed frame publishes (capture_time, held action or None)
+    into a mailbox so the game loop can poll without waiting on the camera
+    or inference. The held action is state rather than an edge, so a
+    dropped sample is corrected by the next one. A multi-player controller
+    publishes a tuple with one held action per player instead.
+    Drop policies:
+      'latest' - keep only the newest sample, older unread ones are dropped
+      'queue'  - keep every sample in order (bounded by max_pending)
+    Samples older than max_age seconds are discarded when polled.
+    Pass controller_factory instead of controller to construct (and warm up)
+    the controller on the worker thread.
+    """
+
+    DROP_POLICIES = ('latest', 'queue')
+
+    def __init__(self, controller=None, policy='latest', max_age=0.25, max_pending=8,
+                 controller_factory=None):
+        if policy not in self.DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        if (controller is None) == (controller_factory is None):
+            raise ValueError("Pass exactly one of controller or controller_factory")
+        self.controller = controller
+        self.controller_factory = controller_factory
+        self.policy = policy
+        self.max_age = max_age
+        # deque append/popleft are atomic, so no lock is needed around the mailbox
+        self.mailbox = deque(maxlen=1 if policy == 'latest' else max_pending)
+        self.dropped = 0
+        # Set once the controller has been built (and warmed up by its factory)
+        self.ready = threading.Event()
+        self.error = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start the capture/inference thread"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='GestureWorker', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        """Build the controller if needed, then publish commands until stopped"""
+        try:
+            if self.controller is None:
+                self.controller = self.controller_factory()
+            self.ready.set()
+            while self._running:
+                previous_capture = self.controller.last_capture_time
+                self.controller.get_finger_position()
+                capture_time = self.controller.last_capture_time
+                if capture_time == previous_capture:
+                    # Camera read failed; back off instead of spinning
+                    time.sleep(0.01)
+                    continue
+                if len(self.mailbox) == self.mailbox.maxlen:
+                    self.dropped += 1
+                self.mailbox.append((capture_time, self.controller.held_action))
+        except Exception as exc:
+            # Keep the game running without gestures
+            self.error = exc
+            print(f"Gesture input stopped: {exc}")
+        finally:
+            # The thread that opened the camera and windows also releases them
+            if self.controller is not None:
+                self.controller.cleanup()
+
+    def poll(self):
+        """Return the next fresh (capture_time, held action) pair without blocking, or None"""
+        now = time.monotonic()
+        while self.mailbox:
+            try:
+                capture_time, command = self.mailbox.popleft()
+            except IndexError:
+                return None
+            if self.max_age is None or now - capture_time <= self.max_age:
+                return capture_time, command
+            self.dropped += 1
+        return None
+
+    def drain(self):
+        """Return every fresh (capture_time, held action) pair waiting in the mailbox, oldest first"""
+        items = []
+        item = self.poll()
+        while item is not None:
+            items.append(item)
+            item = self.poll()
+        return items
+
+    def get_finger_position(self):
+        """Return the most recently held action without blocking (None when idle)"""
+        item = None
+        for item in self.drain():
+            pass
+        return item[1] if item else None
+
+    def cleanup(self):
+        """Stop the worker thread; it releases the camera on its way out"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Input event bus: keyboard keys and gesture zones push press / release
+# events stamped with time.monotonic(); the game collects the resulting
+# commands per tick, with delayed auto-shift (DAS) and auto-repeat (ARR)
+# for held inputs.
+import heapq
+import itertools
+
+from tetris_engine import BOARD_WIDTH
+
+# Seconds an input is held before it starts repeating, and between repeats
+DAS = 0.167
+ARR = 0.033
+# Commands that auto-repeat while held (rotation and hard drop fire once per press)
+REPEAT_COMMANDS = ('LEFT', 'RIGHT', 'DOWN')
+# With ARR 0 a held sideways move jumps this many steps at once (far enough to reach a wall)
+INSTANT_REPEATS = BOARD_WIDTH
+INSTANT_COMMANDS = ('LEFT', 'RIGHT')
+# Soft drop repeats at ARR, or at this interval when ARR is 0, and at most once per collect()
+SOFT_DROP_ARR = 0.033
+
+
+class InputBus:
+    def __init__(self, das=DAS, arr=ARR, repeat_commands=REPEAT_COMMANDS):
+        """Collect timestamped input events from every source"""
+        self.das = das
+        self.arr = arr
+        self.repeat_commands = frozenset(repeat_commands)
+        # Pending events as (time, sequence, kind, command, source), oldest first
+        self.events = []
+        self._sequence = itertools.count()
+        # (source, command) -> time of its next auto-repeat (None when it does not repeat)
+        self.held = {}
+        # Command each stateful source (see hold) reported last
+        self.holding = {}
+
+    def push(self, kind, command, source, timestamp):
+        """Queue a 'press' or 'release' event"""
+        heapq.heappush(self.events, (timestamp, next(self._sequence), kind, command, source))
+
+    def press(self, command, source, timestamp):
+        self.push('press', command, source, timestamp)
+
+    def release(self, command, source, timestamp):
+        self.push('release', command, source, timestamp)
+
+    def hold(self, command, source, timestamp):
+        """Report the command a stateful source (e.g. a gesture zone) holds now, or None"""
+        previous = self.holding.get(source)
+        if command == previous:
+            return
+        if previous is not None:
+            self.release(previous, source, timestamp)
+        if command is not None:
+            self.press(command, source, timestamp)
+        self.holding[source] = command
+
+    def collect(self, until):
+        """Return (time, command, source) for every press and auto-repeat due by `until`, oldest first"""
+        commands = []
+        events = self.events
+        # Soft drop repeats once per collect, across every event in it and every source
+        soft_dropped = False
+        while events and events[0][0] <= until:
+            timestamp, _, kind, command, source = heapq.heappop(events)
+            soft_dropped = self._repeat(commands, timestamp, soft_dropped)
+            key = (source, command)
+            if kind == 'press':
+                if key in self.held:
+                    continue
+                commands.append((timestamp, command, source))
+                self.held[key] = timestamp + self.das if command in self.repeat_commands else None
+            else:
+                self.held.pop(key, None)
+        self._repeat(commands, until, soft_dropped)
+        if len(commands) > 1:
+            commands.sort(key=lambda item: item[0])
+        return commands
+
+    def _repeat(self, commands, until, soft_dropped=False):
+        """Emit the auto-repeats of held inputs that fall due by `until`; return whether a soft drop was emitted"""
+        for key, due in self.held.items():
+            if due is None or due > until:
+                continue
+            source, command = key
+            if not self.arr and command in INSTANT_COMMANDS:
+                # Instant repeat: slide all the way, then stop repeating
+                commands.extend([(due, command, source)] * INSTANT_REPEATS)
+                self.held[key] = None
+                continue
+            if command == 'DOWN':
+                # One step per collect, so piece_locked() takes effect before the next one
+                if not soft_dropped:
+                    commands.append((due, command, source))
+                    self.held[key] = max(due + (self.arr or SOFT_DROP_ARR), until)
+                    soft_dropped = True
+                continue
+            while due <= until:
+                commands.append((due, command, source))
+                due += self.arr
+            self.held[key] = due
+        return soft_dropped
+
+    def piece_locked(self):
+        """Stop repeating held soft drops until they are pressed again, so they end with their piece"""
+        for key in self.held:
+            if key[1] == 'DOWN':
+                self.held[key] = None
+
+    def clear(self):
+        """Drop pending events and release everything that is held"""
+        self.events.clear()
+        self.held.clear()
+        self.holding.clear()
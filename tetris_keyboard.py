@@ -1,17 +1,21 @@
 # -*- coding: utf-8 -*-
 # Hello ! Myself Utsa Ghosh ... Hope you enjoy playing this game ...
+import argparse
 import pygame
-import random
 import sys
-from tetris_gesture_control import HandGestureController
-
-# Initialize Pygame
-pygame.init()
+import time
+import tetris_engine
+from tetris_engine import BOARD_HEIGHT, BOARD_WIDTH
+from tetris_fingertip import SMOOTHING_MODES
+from tetris_gesture_worker import GestureWorker
+from tetris_input import ARR, DAS, InputBus
+from tetris_metrics import LatencyRecorder
+from tetris_replay import ReplayRecorder
+from tetris_timestep import TICK_RATE, FixedTimestep
+from tetris_pieces import PIECE_COLORS
 
 # Constants
 BLOCK_SIZE = 30
-BOARD_WIDTH = 10
-BOARD_HEIGHT = 20
 SCREEN_WIDTH = BOARD_WIDTH * BLOCK_SIZE + 300
 SCREEN_HEIGHT = 600
 
@@ -24,133 +28,33 @@ ASCII_ARROWS = {
     'SPACE': '_|_'
 }
 
+# Keyboard keys mapped to engine commands
+KEY_COMMANDS = {
+    pygame.K_LEFT: 'LEFT',
+    pygame.K_RIGHT: 'RIGHT',
+    pygame.K_UP: 'ROTATE',
+    pygame.K_DOWN: 'DOWN',
+    pygame.K_SPACE: 'HARD_DROP',
+}
+
 # Define colors (R, G, B)
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 GRAY = (40, 40, 40)
 GRID_COLOR = (50, 50, 50)
 
-# Bright, distinct colors for tetris pieces
-PIECE_COLORS = [
-    (255, 50, 50),    # Bright Red
-    (50, 255, 50),    # Bright Green
-    (50, 50, 255),    # Bright Blue
-    (255, 255, 50),   # Bright Yellow
-    (255, 50, 255),   # Bright Magenta
-    (50, 255, 255),   # Bright Cyan
-]
-
-# Define tetromino shapes using 2D arrays
-TETROMINO_SHAPES = [
-    [[1, 1, 1, 1]],           # I piece
-    [[1, 1], [1, 1]],         # O piece
-    [[1, 1, 1], [0, 1, 0]],   # T piece
-    [[1, 1, 1], [1, 0, 0]],   # L piece
-    [[1, 1, 1], [0, 0, 1]],   # J piece
-    [[1, 1, 0], [0, 1, 1]],   # S piece
-    [[0, 1, 1], [1, 1, 0]]    # Z piece
-]
+class Tetris(tetris_engine.Tetris):
+    """Tetris engine plus pygame rendering"""
+    
+    def __init__(self, use_bitboard=False, seed=None, height=BOARD_HEIGHT, tick_rate=TICK_RATE):
+        # Created on first draw so headless games never touch pygame fonts
+        self.renderer = None
+        self.side_panel = None
+        super().__init__(use_bitboard=use_bitboard, seed=seed, height=height, tick_rate=tick_rate)
 
-class Tetris:
-    def __init__(self):
-        """Initialize the game state"""
-        self.reset()
-        
-    def reset(self):
-        """Reset the game to initial state"""
-        # Create empty game board
-        self.board = [[0 for _ in range(BOARD_WIDTH)] for _ in range(BOARD_HEIGHT)]
-        self.score = 0
-        self.level = 1
-        self.lines_cleared = 0
-        self.game_over = False
-        self.view_offset = 0  # For scrolling view
-        self.spawn_new_piece()
-        
-    def spawn_new_piece(self):
-        """Create and position a new falling piece"""
-        self.current_piece = random.choice(TETROMINO_SHAPES)
-        self.current_color = random.randint(0, len(PIECE_COLORS) - 1)
-        # Center the piece horizontally
-        self.piece_x = BOARD_WIDTH // 2 - len(self.current_piece[0]) // 2
-        self.piece_y = 0
-        
-        # Calculate ghost piece position (preview of where piece will land)
-        self.ghost_y = self.piece_y
-        while not self.check_collision(self.piece_x, self.ghost_y + 1, self.current_piece):
-            self.ghost_y += 1
-            
-        # Check if new piece overlaps with existing pieces (game over condition)
-        if self.check_collision(self.piece_x, self.piece_y, self.current_piece):
-            self.game_over = True
-            
-    def check_collision(self, x, y, piece):
-        """Check if piece collides with board boundaries or other pieces"""
-        for row_idx, row in enumerate(piece):
-            for col_idx, cell in enumerate(row):
-                if cell:
-                    board_x = x + col_idx
-                    board_y = y + row_idx
-                    # Check boundaries and existing pieces
-                    if (board_x < 0 or board_x >= BOARD_WIDTH or 
-                        board_y >= BOARD_HEIGHT or 
-                        (board_y >= 0 and self.board[board_y][board_x])):
-                        return True
-        return False
-        
-    def move_piece(self, dx):
-        """Move piece horizontally if no collision"""
-        if not self.check_collision(self.piece_x + dx, self.piece_y, self.current_piece):
-            self.piece_x += dx
-            # Update ghost piece position after movement
-            self.ghost_y = self.piece_y
-            while not self.check_collision(self.piece_x, self.ghost_y + 1, self.current_piece):
-                self.ghost_y += 1
-            
-    def rotate_piece(self):
-        """Rotate piece if rotation is possible"""
-        # Create rotated version of piece
-        rotated = list(zip(*reversed(self.current_piece)))
-        rotated = [list(row) for row in rotated]
-        if not self.check_collision(self.piece_x, self.piece_y, rotated):
-            self.current_piece = rotated
-            # Update ghost piece position after rotation
-            self.ghost_y = self.piece_y
-            while not self.check_collision(self.piece_x, self.ghost_y + 1, self.current_piece):
-                self.ghost_y += 1
-            
-    def drop_piece(self):
-        """Move piece down one step, return False if piece is locked"""
-        if not self.check_collision(self.piece_x, self.piece_y + 1, self.current_piece):
-            self.piece_y += 1
-            return True
-        else:
-            self.lock_piece()
-            self.spawn_new_piece()
-            return False
-            
-    def lock_piece(self):
-        """Lock the current piece in place and check for completed lines"""
-        for y, row in enumerate(self.current_piece):
-            for x, cell in enumerate(row):
-                if cell:
-                    if 0 <= self.piece_y + y < BOARD_HEIGHT:
-                        self.board[self.piece_y + y][self.piece_x + x] = self.current_color + 1
-        self.clear_lines()
-        
-    def clear_lines(self):
-        """Remove completed lines and update score"""
-        lines_cleared = 0
-        for y in range(BOARD_HEIGHT):
-            if all(self.board[y]):
-                lines_cleared += 1
-                del self.board[y]
-                self.board.insert(0, [0] * BOARD_WIDTH)
-        
-        if lines_cleared > 0:
-            self.lines_cleared += lines_cleared
-            self.score += lines_cleared * 100 * self.level
-            self.level = self.lines_cleared // 10 + 1
+    def follow_piece(self):
+        """Scroll tall boards so the falling piece, and its landing spot if it fits, are on screen"""
+        self.view_offset = scroll_offset(self.piece_y, self.ghost_y + self.piece.height, self.height)
 
     def draw_grid(self, screen):
         """Draw the game grid"""
@@ -162,7 +66,7 @@ class Tetris:
 
         # Draw horizontal grid lines
         visible_start = self.view_offset
-        visible_end = min(BOARD_HEIGHT, self.view_offset + 30)
+        visible_end = min(self.height, self.view_offset + BoardRenderer.VISIBLE_ROWS)
         for y in range(visible_start, visible_end + 1):
             screen_y = (y - self.view_offset) * BLOCK_SIZE
             pygame.draw.line(screen, GRID_COLOR,
@@ -170,100 +74,189 @@ class Tetris:
                            (BOARD_WIDTH * BLOCK_SIZE, screen_y))
             
     def draw(self, screen):
-        screen.fill(BLACK)
+        """Draw the game and return the list of screen rectangles that changed"""
+        if self.renderer is None:
+            self.renderer = BoardRenderer()
+        dirty_rects = self.renderer.draw(screen, self)
+        
+        # Draw side panel
+        if self.side_panel is None:
+            self.side_panel = SidePanel()
+        dirty_rects.extend(self.side_panel.draw(screen, self, force=self.renderer.full_redraw))
+        return dirty_rects
+
+class BoardRenderer:
+    """Board renderer that blits pre-rendered tiles for changed cells only"""
+    
+    # Board rows that fit on screen at once
+    VISIBLE_ROWS = -(-SCREEN_HEIGHT // BLOCK_SIZE)
+    
+    def __init__(self):
+        self.target = None
+        self.view_offset = None
+        # Tile key of every visible cell in the last frame (None forces a full pass)
+        self.frame = None
+        self.full_redraw = False
+        
+    def _build_tiles(self, screen, game):
+        """Pre-render the static background and one tile per block and ghost colour"""
+        self.background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), 0, screen)
+        self.background.fill(BLACK)
         
         # Draw game border
         border_padding = 5
-        pygame.draw.rect(screen, WHITE, 
+        pygame.draw.rect(self.background, WHITE, 
                         (-border_padding, -border_padding, 
                          BOARD_WIDTH * BLOCK_SIZE + 2*border_padding, 
                          SCREEN_HEIGHT + 2*border_padding), 2)
         
-        self.draw_grid(screen)
+        game.draw_grid(self.background)
         
-        # Draw ghost piece
-        if not self.game_over:
-            for y, row in enumerate(self.current_piece):
-                for x, cell in enumerate(row):
-                    if cell:
-                        ghost_color = (PIECE_COLORS[self.current_color][0] // 4,
-                                     PIECE_COLORS[self.current_color][1] // 4,
-                                     PIECE_COLORS[self.current_color][2] // 4)
-                        pygame.draw.rect(screen, ghost_color,
-                                       ((self.piece_x + x) * BLOCK_SIZE + 1,
-                                        (self.ghost_y - self.view_offset + y) * BLOCK_SIZE + 1,
-                                        BLOCK_SIZE - 2, BLOCK_SIZE - 2))
+        # Every cell owns the grid lines on its left and top edge, so they all
+        # share the same empty tile; board values 1..n index the block tiles
+        empty_tile = self.background.subsurface((0, 0, BLOCK_SIZE, BLOCK_SIZE)).copy()
+        self.tiles = [empty_tile]
+        for color in PIECE_COLORS:
+            self.tiles.append(self._block_tile(empty_tile, color))
+        self.ghost_base = len(self.tiles)
+        for color in PIECE_COLORS:
+            ghost_color = (color[0] // 4, color[1] // 4, color[2] // 4)
+            self.tiles.append(self._block_tile(empty_tile, ghost_color))
+            
+    def _block_tile(self, empty_tile, color):
+        """Return a copy of the empty tile with a block of the given colour"""
+        tile = empty_tile.copy()
+        pygame.draw.rect(tile, color, (1, 1, BLOCK_SIZE - 2, BLOCK_SIZE - 2))
+        return tile
         
-        # Draw board
-        visible_start = max(0, self.view_offset)
-        visible_end = min(BOARD_HEIGHT, self.view_offset + 30)
+    def _mark_piece(self, frame, game, top_y, key, over_board=True):
+        """Write a piece's tile key into the frame at rows starting from top_y"""
+        for x, y in game.piece.cells:
+            screen_y = top_y + y - game.view_offset
+            if 0 <= screen_y < len(frame):
+                row = frame[screen_y]
+                if over_board or not row[game.piece_x + x]:
+                    row[game.piece_x + x] = key
+                
+    def draw(self, screen, game):
+        """Blit changed cells and return their rectangles"""
+        self.full_redraw = screen is not self.target or game.view_offset != self.view_offset
+        if self.full_redraw:
+            self.target = screen
+            self.view_offset = game.view_offset
+            self._build_tiles(screen, game)
+            screen.blit(self.background, (0, 0))
+            self.frame = None
+            
+        # Board colour values double as tile keys; overlay ghost, then piece
+        visible_start = max(0, game.view_offset)
+        visible_end = min(game.height, game.view_offset + self.VISIBLE_ROWS)
+        frame = [row[:] for row in game.board[visible_start:visible_end]]
+        if not game.game_over:
+            self._mark_piece(frame, game, game.ghost_y, self.ghost_base + game.current_color,
+                             over_board=False)
+            self._mark_piece(frame, game, game.piece_y, game.current_color + 1)
+            
+        tiles = self.tiles
+        previous = self.frame
+        blits = []
+        dirty_rects = []
+        for screen_y, row in enumerate(frame):
+            old_row = previous[screen_y] if previous is not None else None
+            if row == old_row:
+                continue
+            for x, key in enumerate(row):
+                if old_row is None or old_row[x] != key:
+                    rect = pygame.Rect(x * BLOCK_SIZE, screen_y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+                    blits.append((tiles[key], rect))
+                    dirty_rects.append(rect)
+        if blits:
+            screen.blits(blits, doreturn=False)
+        self.frame = frame
         
-        for y in range(visible_start, visible_end):
-            for x in range(BOARD_WIDTH):
-                if self.board[y][x]:
-                    color = PIECE_COLORS[self.board[y][x] - 1]
-                    pygame.draw.rect(screen, color,
-                                   (x * BLOCK_SIZE + 1,
-                                    (y - self.view_offset) * BLOCK_SIZE + 1,
-                                    BLOCK_SIZE - 2, BLOCK_SIZE - 2))
-                    
-        # Draw current piece
-        if not self.game_over:
-            for y, row in enumerate(self.current_piece):
-                for x, cell in enumerate(row):
-                    if cell:
-                        pygame.draw.rect(screen, PIECE_COLORS[self.current_color],
-                                       ((self.piece_x + x) * BLOCK_SIZE + 1,
-                                        (self.piece_y - self.view_offset + y) * BLOCK_SIZE + 1,
-                                        BLOCK_SIZE - 2, BLOCK_SIZE - 2))
+        if self.full_redraw:
+            return [screen.get_rect()]
+        return dirty_rects
+
+def scroll_offset(piece_y, landing_bottom, height, rows=BoardRenderer.VISIBLE_ROWS):
+    """First board row to show so row piece_y is always in the `rows` on screen
+
+    The piece sits mid-screen, or higher when that brings its landing spot
+    (ending above row landing_bottom) into view as well.
+    """
+    offset = max(piece_y - rows // 2, landing_bottom - rows)
+    offset = min(offset, piece_y)
+    return max(0, min(offset, height - rows))
+
+class SidePanel:
+    """Side panel renderer that builds fonts and static text only once"""
+    
+    STAT_BOX_HEIGHT = 60
+    
+    # Stages listed in the latency readout, with their display labels
+    LATENCY_STAGES = [
+        ('capture', 'Capture'),
+        ('inference', 'Inference'),
+        ('update', 'Update'),
+        ('draw', 'Draw'),
+        ('input_latency', 'Input'),
+    ]
+    LATENCY_REFRESH = 0.5  # Seconds between latency readout updates
+    
+    def __init__(self, metrics=None):
+        self.header_font = pygame.font.Font(None, 32)
+        self.normal_font = pygame.font.Font(None, 28)
+        self.game_over_font = pygame.font.Font(None, 48)
+        self.small_font = pygame.font.Font(None, 20)
         
-        # Draw side panel
-        panel_x = BOARD_WIDTH * BLOCK_SIZE + 20
-        panel_width = SCREEN_WIDTH - panel_x - 10
+        # Optional LatencyRecorder shown as p50/p95/p99 lines under the controls
+        self.metrics = metrics
+        self.latency_lines = ()
+        self.latency_surfaces = []
+        self.latency_updated = 0
         
-        # Draw panel background
-        pygame.draw.rect(screen, GRAY,
-                        (panel_x - 10, 0, panel_width + 10, SCREEN_HEIGHT))
+        self.panel_x = BOARD_WIDTH * BLOCK_SIZE + 20
+        self.panel_width = SCREEN_WIDTH - self.panel_x - 10
+        self.rect = pygame.Rect(self.panel_x - 10, 0, self.panel_width + 10, SCREEN_HEIGHT)
         
-        # Draw game info
-        header_font = pygame.font.Font(None, 32)
-        normal_font = pygame.font.Font(None, 28)
+        # Last rendered value text per stat: header -> (value string, Surface)
+        self.value_cache = {}
+        # Stats shown by the last draw, to skip redrawing an unchanged panel
+        self.shown_state = None
+        self.background = self._render_static()
+        self.game_over_text = self.game_over_font.render('GAME OVER', True, (255, 0, 0))
         
-        # Game stats section
-        y_pos = 20
-        stats = [
-            ("SCORE", str(self.score)),
-            ("LEVEL", str(self.level)),
-            ("LINES", str(self.lines_cleared))
-        ]
+    def _render_static(self):
+        """Pre-render panel background, stat headers and the controls block"""
+        surface = pygame.Surface(self.rect.size)
+        surface.fill(GRAY)
+        # Static content is drawn in panel-local coordinates
+        panel_x = self.panel_x - self.rect.x
+        panel_width = self.panel_width
+        header_font = self.header_font
+        normal_font = self.normal_font
         
-        for header, value in stats:
-            box_height = 60
-            pygame.draw.rect(screen, (60, 60, 60),
-                           (panel_x, y_pos, panel_width - 20, box_height))
-            
+        # Game stats section (values are drawn per frame)
+        y_pos = 20
+        for header in ("SCORE", "LEVEL", "LINES"):
+            pygame.draw.rect(surface, (60, 60, 60),
+                           (panel_x, y_pos, panel_width - 20, self.STAT_BOX_HEIGHT))
             header_text = header_font.render(header, True, (200, 200, 200))
-            value_text = header_font.render(value, True, (255, 255, 0))
-            
             header_x = panel_x + (panel_width - 20 - header_text.get_width()) // 2
-            value_x = panel_x + (panel_width - 20 - value_text.get_width()) // 2
-            
-            screen.blit(header_text, (header_x, y_pos + 8))
-            screen.blit(value_text, (value_x, y_pos + 32))
-            
-            y_pos += box_height + 8
+            surface.blit(header_text, (header_x, y_pos + 8))
+            y_pos += self.STAT_BOX_HEIGHT + 8
         
         # Controls section
         y_pos += 15
         controls_header = header_font.render("CONTROLS", True, (255, 255, 0))
         header_x = panel_x + (panel_width - 20 - controls_header.get_width()) // 2
-        screen.blit(controls_header, (header_x, y_pos))
+        surface.blit(controls_header, (header_x, y_pos))
         
         y_pos += 35
         
         # Draw control box
         control_box_height = 200
-        pygame.draw.rect(screen, (60, 60, 60),
+        pygame.draw.rect(surface, (60, 60, 60),
                         (panel_x, y_pos, panel_width - 20, control_box_height))
         
         # Draw controls
@@ -281,7 +274,7 @@ class Tetris:
         for symbol, action in controls:
             # Create a small box for the symbol
             symbol_box_width = 50  # Increased width for new symbols
-            pygame.draw.rect(screen, (80, 80, 80),
+            pygame.draw.rect(surface, (80, 80, 80),
                            (panel_x + 15, y_pos - 5, 
                             symbol_box_width, 30))
             
@@ -291,17 +284,78 @@ class Tetris:
             
             # Center symbol in its box
             symbol_x = panel_x + 15 + (symbol_box_width - symbol_text.get_width()) // 2
-            screen.blit(symbol_text, (symbol_x, y_pos))
+            surface.blit(symbol_text, (symbol_x, y_pos))
             
             # Draw action text after the symbol box
-            screen.blit(action_text, (panel_x + symbol_box_width + 25, y_pos + 5))
+            surface.blit(action_text, (panel_x + symbol_box_width + 25, y_pos + 5))
             
             y_pos += 27
+        return surface
+        
+    def _value_text(self, header, value):
+        """Return the rendered value text, re-rendering only when it changed"""
+        cached = self.value_cache.get(header)
+        if cached is None or cached[0] != value:
+            cached = (value, self.header_font.render(value, True, (255, 255, 0)))
+            self.value_cache[header] = cached
+        return cached[1]
+        
+    def _update_latency_lines(self):
+        """Refresh the latency readout text at most every LATENCY_REFRESH seconds"""
+        now = time.monotonic()
+        if now - self.latency_updated < self.LATENCY_REFRESH:
+            return
+        self.latency_updated = now
+        lines = [("ms", "p50 / p95 / p99")]
+        for stage, label in self.LATENCY_STAGES:
+            values = self.metrics.percentiles(stage)
+            if values:
+                lines.append((label, "%.1f / %.1f / %.1f" % values))
+        lines = tuple(lines)
+        if lines != self.latency_lines:
+            self.latency_lines = lines
+            self.latency_surfaces = [(self.small_font.render(label, True, (200, 200, 200)),
+                                      self.small_font.render(values, True, (255, 255, 0)))
+                                     for label, values in lines]
+        
+    def draw(self, screen, game, force=False):
+        """Draw the panel if its contents changed; return the dirty rectangles"""
+        if self.metrics is not None:
+            self._update_latency_lines()
+        state = (game.score, game.level, game.lines_cleared, game.game_over, self.latency_lines)
+        if state == self.shown_state and not force:
+            return []
+        self.shown_state = state
+        
+        screen.blit(self.background, self.rect)
+        panel_x = self.panel_x
+        panel_width = self.panel_width
+        
+        # Game stats section
+        y_pos = 20
+        stats = [
+            ("SCORE", str(game.score)),
+            ("LEVEL", str(game.level)),
+            ("LINES", str(game.lines_cleared))
+        ]
+        
+        for header, value in stats:
+            value_text = self._value_text(header, value)
+            value_x = panel_x + (panel_width - 20 - value_text.get_width()) // 2
+            screen.blit(value_text, (value_x, y_pos + 32))
+            y_pos += self.STAT_BOX_HEIGHT + 8
+        
+        # Latency readout below the controls block; the game over box takes its place
+        if not game.game_over:
+            y_pos = 482
+            for label_text, values_text in self.latency_surfaces:
+                screen.blit(label_text, (panel_x, y_pos))
+                screen.blit(values_text, (panel_x + 75, y_pos))
+                y_pos += 16
         
         # Game Over message
-        if self.game_over:
-            game_over_font = pygame.font.Font(None, 48)
-            game_over_text = game_over_font.render('GAME OVER', True, (255, 0, 0))
+        if game.game_over:
+            game_over_text = self.game_over_text
             text_x = panel_x + (panel_width - 20 - game_over_text.get_width()) // 2
             text_y = SCREEN_HEIGHT - 100
             
@@ -309,36 +363,259 @@ class Tetris:
                            (panel_x, text_y - 8, 
                             panel_width - 20, game_over_text.get_height() + 16))
             screen.blit(game_over_text, (text_x, text_y))
+        return [self.rect]
+
+class CameraPreview:
+    """Gesture camera feed drawn inside the game window instead of a second OpenCV window"""
+    
+    SOURCE_SIZE = (640, 480)  # Camera frame size the control zones are laid out on
+    
+    def __init__(self, x, y, step=2):
+        # Every step-th pixel in each direction is shown
+        self.step = step
+        self.rect = pygame.Rect(x, y, self.SOURCE_SIZE[0] // step, self.SOURCE_SIZE[1] // step)
+        self.surface = pygame.Surface(self.rect.size)
+        self.font = pygame.font.Font(None, 24)
+        # Grid and zone labels, rendered once from the first controller seen
+        self.overlay = None
+        self.action_texts = {}
+        self.shown = None
+        
+    def _render_overlay(self, controller):
+        """Pre-render the zone outlines and labels as a transparent layer"""
+        overlay = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        scale_x = self.rect.width / self.SOURCE_SIZE[0]
+        scale_y = self.rect.height / self.SOURCE_SIZE[1]
+        for action, (x0, y0, x1, y1) in controller.zone_layout.zones:
+            zone = pygame.Rect(int(x0 * scale_x), int(y0 * scale_y),
+                               int((x1 - x0) * scale_x), int((y1 - y0) * scale_y))
+            pygame.draw.rect(overlay, WHITE, zone, 1)
+            label = self.font.render(action, True, WHITE)
+            overlay.blit(label, (zone.centerx - label.get_width() // 2,
+                                 zone.centery - label.get_height() // 2))
+        return overlay
+        
+    def draw(self, screen, controller):
+        """Draw the controller's newest preview frame; return the dirty rectangles"""
+        preview = getattr(controller, 'preview_frame', None)
+        if preview is None or preview is self.shown:
+            return []
+        self.shown = preview
+        if self.overlay is None:
+            self.overlay = self._render_overlay(controller)
+        image, fingertip, action = preview
+        
+        # Subsampled, BGR-to-RGB and transposed purely as array views, so the
+        # only copy is the one into the surface
+        step = self.step
+        width, height = self.rect.size
+        view = image[:height * step:step, :width * step:step, ::-1].swapaxes(0, 1)
+        if view.shape[:2] == (width, height):
+            pygame.surfarray.blit_array(self.surface, view)
+        else:
+            self.surface.fill(BLACK)
+            pygame.surfarray.blit_array(self.surface.subsurface((0, 0) + view.shape[:2]), view)
+        self.surface.blit(self.overlay, (0, 0))
+        
+        if fingertip is not None:
+            pygame.draw.circle(self.surface, (0, 255, 0),
+                               (fingertip[0] // step, fingertip[1] // step), max(3, 10 // step))
+        if action:
+            text = self.action_texts.get(action)
+            if text is None:
+                text = self.action_texts[action] = self.font.render(f"Action: {action}", True, (0, 255, 0))
+            self.surface.blit(text, (5, 5))
+        screen.blit(self.surface, self.rect)
+        return [self.rect]
 
-def main():
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Gesture-controlled Tetris')
+    parser.add_argument('--input', choices=['gesture', 'keyboard', 'ai'], default='gesture',
+                        help='gesture: webcam plus keyboard; keyboard: skip loading the camera stack; '
+                             'ai: the built-in bot plays (keyboard still works)')
+    parser.add_argument('--gesture-mode', choices=['async', 'sync'], default='async',
+                        help='run hand tracking on a background thread (async) or in the game loop (sync)')
+    parser.add_argument('--drop-policy', choices=GestureWorker.DROP_POLICIES, default='latest',
+                        help='how the async worker handles commands the game has not read yet')
+    parser.add_argument('--max-command-age', type=float, default=0.25,
+                        help='discard async gesture commands older than this many seconds')
+    parser.add_argument('--preview', choices=['window', 'embed', 'off'], default='window',
+                        help='camera preview: separate OpenCV window, inside the game window, or none')
+    parser.add_argument('--preview-step', type=int, default=2,
+                        help='with --preview embed, show every Nth pixel of the camera frame')
+    parser.add_argument('--preview-interval', type=int, default=1,
+                        help='with --preview embed, show every Nth camera frame')
+    parser.add_argument('--source', default='0',
+                        help='gesture input: camera index, video file or .npy frame dump')
+    parser.add_argument('--fast-replay', action='store_true',
+                        help='replay a recorded --source as fast as possible instead of at recorded speed')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='crop inference around the hand and track the fingertip between model runs')
+    parser.add_argument('--inference-scale', type=float, default=1.0,
+                        help='resize factor for images passed to MediaPipe')
+    parser.add_argument('--detect-interval', type=int, default=3,
+                        help='with --adaptive, run MediaPipe at least every N frames')
+    parser.add_argument('--smoothing', choices=SMOOTHING_MODES, default='one_euro',
+                        help='fingertip smoothing filter')
+    parser.add_argument('--prediction-lead', type=float, default=0.08,
+                        help='seconds of fingertip motion extrapolated for early zone activation (0 = off)')
+    parser.add_argument('--players', type=int, default=1,
+                        help='boards side by side; each hand (one --source) or each camera '
+                             '(comma-separated --source, one per player) controls its own board')
+    parser.add_argument('--mosaic', action='store_true',
+                        help='with one camera per player, stitch the frames together for a single hand-model run')
+    parser.add_argument('--ai-lookahead', type=int, default=1,
+                        help='pieces the bot looks ahead (0-2)')
+    parser.add_argument('--ai-workers', type=int, default=0,
+                        help='worker processes for the bot search (0 = in-process)')
+    parser.add_argument('--ai-interval', type=int, default=3,
+                        help='ticks between bot moves')
+    parser.add_argument('--board-height', type=int, default=BOARD_HEIGHT,
+                        help='rows on the board (e.g. thousands for endurance runs)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for the piece sequence (random by default)')
+    parser.add_argument('--record', metavar='PATH', default=None,
+                        help='record every input to a replay file (see tetris_replay.py)')
+    parser.add_argument('--das', type=float, default=DAS,
+                        help='seconds a key or gesture zone is held before it auto-repeats')
+    parser.add_argument('--arr', type=float, default=ARR,
+                        help='seconds between auto-repeats (0 = slide straight to the wall)')
+    parser.add_argument('--tick-rate', type=int, default=TICK_RATE,
+                        help='game logic ticks per second of real time')
+    parser.add_argument('--fps', type=int, default=60,
+                        help='render frame cap (0 = uncapped)')
+    parser.add_argument('--vsync', action='store_true',
+                        help='wait for the display refresh when presenting frames')
+    parser.add_argument('--show-latency', action='store_true',
+                        help='show per-stage p50/p95/p99 latency in the side panel')
+    parser.add_argument('--latency-dump', metavar='PATH',
+                        help='write latency statistics to PATH (.json or .csv) on exit')
+    args = parser.parse_args(argv)
+    if args.record and args.board_height != BOARD_HEIGHT:
+        parser.error('--record needs the standard --board-height')
+    if args.record and args.tick_rate != TICK_RATE:
+        parser.error('--record needs the standard --tick-rate')
+    if args.players > 1:
+        if args.input != 'gesture':
+            parser.error('--players needs --input gesture')
+        if args.preview == 'embed' or args.record:
+            parser.error('--preview embed and --record support a single player')
+        # The multi-player controller runs full detection on every frame
+        if args.adaptive or args.detect_interval != parser.get_default('detect_interval'):
+            parser.error('--adaptive and --detect-interval support a single player')
+    return args
+
+def make_gesture_controller(args, metrics=None):
+    """Import, build and warm up the gesture controller (loads OpenCV and MediaPipe)"""
+    if args.players > 1:
+        from tetris_multiplayer import open_multiplayer
+        controller = open_multiplayer(args.players, args.source, realtime=not args.fast_replay,
+                                      mosaic=args.mosaic, inference_scale=args.inference_scale,
+                                      metrics=metrics, preview=args.preview, smoothing=args.smoothing,
+                                      prediction_lead=args.prediction_lead)
+        controller.warm_up()
+        return controller
+    
+    from tetris_frame_source import open_frame_source
+    from tetris_gesture_control import HandGestureController
+    
+    frame_source = open_frame_source(args.source, realtime=not args.fast_replay)
+    controller = HandGestureController(metrics=metrics, frame_source=frame_source,
+                                       adaptive=args.adaptive, inference_scale=args.inference_scale,
+                                       detect_interval=args.detect_interval,
+                                       preview=args.preview, preview_interval=args.preview_interval,
+                                       smoothing=args.smoothing, prediction_lead=args.prediction_lead)
+    controller.warm_up()
+    return controller
+
+def main(argv=None):
+    args = parse_args(argv)
+    pygame.init()
+    # The embedded camera preview gets its own column right of the side panel
+    preview = None
+    window_size = (SCREEN_WIDTH * args.players, SCREEN_HEIGHT)
+    if args.input == 'gesture' and args.preview == 'embed':
+        preview = CameraPreview(SCREEN_WIDTH, 20, step=args.preview_step)
+        window_size = (SCREEN_WIDTH + preview.rect.width + 10, SCREEN_HEIGHT)
+    if args.vsync:
+        # pygame only honours vsync on scaled / OpenGL displays
+        screen = pygame.display.set_mode(window_size, pygame.SCALED, vsync=1)
+    else:
+        screen = pygame.display.set_mode(window_size)
     pygame.display.set_caption('Tetris')
     clock = pygame.time.Clock()
-    game = Tetris()
+    game = Tetris(seed=args.seed, height=args.board_height, tick_rate=args.tick_rate)
+    # Extra players get the same piece sequence, each on its own slice of the window
+    games = [game] + [Tetris(seed=game.seed, height=args.board_height, tick_rate=args.tick_rate)
+                      for _ in range(args.players - 1)]
+    boards = [screen] if args.players == 1 else [
+        screen.subsurface((player * SCREEN_WIDTH, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+        for player in range(args.players)]
     
-    # Initialize hand gesture controller
-    controller = HandGestureController()
+    # Inputs are recorded with the tick they were applied on, so the session can be re-simulated
+    recorder = ReplayRecorder(args.record, game.seed) if args.record else None
     
-    fall_time = 0
+    def apply(command, source, player=0):
+        """Apply a command to a player's game and record it"""
+        target = games[player]
+        spawned = target.pieces_spawned
+        if command == 'RESET':
+            target.reset()
+        else:
+            target.apply_command(command)
+        if target.pieces_spawned != spawned:
+            # A held soft drop ends with its piece
+            buses[player].piece_locked()
+        if recorder is not None:
+            recorder.record(target.ticks, command, source)
+    
+    # Per-stage timing, only collected when it will be shown or saved
+    metrics = LatencyRecorder() if args.show_latency or args.latency_dump else None
+    if args.show_latency:
+        game.side_panel = SidePanel(metrics=metrics)
+    
+    # Built-in bot: plans each piece on spawn (off the loop), then plays one move every few ticks
+    bot = None
+    if args.input == 'ai':
+        from tetris_ai import TetrisBot
+        bot = TetrisBot(lookahead=args.ai_lookahead, workers=args.ai_workers)
+    bot_plan = []
+    bot_future = None
+    bot_piece = None
+    bot_wait = 0
+    
+    # Initialize hand gesture controller (only when gesture input is enabled)
+    controller = None
+    if args.input == 'gesture':
+        if args.gesture_mode == 'async':
+            # Build and warm up the vision stack on the worker thread while the
+            # game is already rendering, then poll commands without blocking
+            controller = GestureWorker(controller_factory=lambda: make_gesture_controller(args, metrics),
+                                       policy=args.drop_policy,
+                                       max_age=args.max_command_age).start()
+        else:
+            controller = make_gesture_controller(args, metrics)
+    
+    # Game logic runs on a fixed timestep, independent of the render frame rate
+    stepper = FixedTimestep(tick_rate=args.tick_rate)
+    # Keyboard and gesture input as timestamped press / release events, with auto-repeat
+    # (one bus per player; the keyboard drives the first)
+    buses = [InputBus(das=args.das, arr=args.arr) for _ in games]
+    bus = buses[0]
+    
+    def apply_inputs(until):
+        """Apply every input command due by `until`"""
+        for player, player_bus in enumerate(buses):
+            for event_time, command, source in player_bus.collect(until):
+                apply(command, source, player)
+                if source == 'gesture' and metrics is not None:
+                    # End-to-end: from camera frame capture to the move being applied
+                    metrics.record('input_latency', time.monotonic() - event_time)
     
     try:
         while True:
-            # Calculate fall speed based on level
-            fall_speed = max(50 - (game.level * 3), 10)
-            
-            # Get gesture command
-            command = controller.get_finger_position()
-            
-            # Handle gesture commands
-            if not game.game_over:
-                if command == "LEFT":
-                    game.move_piece(-1)
-                elif command == "RIGHT":
-                    game.move_piece(1)
-                elif command == "ROTATE":
-                    game.rotate_piece()
-                elif command == "DOWN":
-                    game.drop_piece()
+            update_start = time.perf_counter()
             
             # Handle keyboard events
             for event in pygame.event.get():
@@ -347,41 +624,91 @@ def main():
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_q:
                         return
-                    if not game.game_over:
-                        if event.key == pygame.K_LEFT:
-                            game.move_piece(-1)
-                        elif event.key == pygame.K_RIGHT:
-                            game.move_piece(1)
-                        elif event.key == pygame.K_UP:
-                            game.rotate_piece()
-                        elif event.key == pygame.K_DOWN:
-                            game.drop_piece()
-                        elif event.key == pygame.K_SPACE:
-                            while game.drop_piece():
-                                pass
+                    if event.key in KEY_COMMANDS:
+                        bus.press(KEY_COMMANDS[event.key], 'keyboard', time.monotonic())
                     elif event.key == pygame.K_r:
-                        game.reset()
+                        for player, player_game in enumerate(games):
+                            if player_game.game_over:
+                                apply('RESET', 'keyboard', player)
+                elif event.type == pygame.KEYUP and event.key in KEY_COMMANDS:
+                    bus.release(KEY_COMMANDS[event.key], 'keyboard', time.monotonic())
             
-            # Regular game updates
-            if not game.game_over:
-                fall_time += 1
-                if fall_time >= fall_speed:
-                    game.drop_piece()
-                    fall_time = 0
+            # Get the held gesture zone along with the capture time of its frames
+            gestures = []
+            if isinstance(controller, GestureWorker):
+                gestures = controller.drain()
+            elif controller:
+                gesture = controller.poll()
+                if gesture:
+                    gestures = [gesture]
+            for capture_time, action in gestures:
+                # The multi-player controller holds one action per player
+                actions = action if args.players > 1 else (action,)
+                for player_bus, player_action in zip(buses, actions):
+                    player_bus.hold(player_action, 'gesture', capture_time)
             
-            # Update view offset
-            if game.piece_y >= 25:
-                game.view_offset = max(0, min(game.piece_y - 20, BOARD_HEIGHT - 30))
-            else:
-                game.view_offset = 0
+            # Run every tick that is due in real time; after a slow frame the
+            # missed ticks are caught up, each with the input that arrived during it
+            now = time.monotonic()
+            for tick_end in stepper.advance(now):
+                apply_inputs(tick_end)
+                
+                # Handle bot moves
+                if bot is not None:
+                    if game.game_over:
+                        # Soak testing: start over straight away
+                        apply('RESET', 'ai')
+                    if bot_piece != game.pieces_spawned:
+                        # A plan still running for an earlier piece is dropped when it finishes
+                        bot_piece = game.pieces_spawned
+                        bot_plan = []
+                        bot_future = bot.plan_async(game)
+                    if bot_future is not None and bot_future.done():
+                        bot_plan = bot_future.result()
+                        bot_future = None
+                    bot_wait -= 1
+                    if bot_plan and bot_wait <= 0:
+                        apply(bot_plan.pop(0), 'ai')
+                        bot_wait = args.ai_interval
+                
+                # Regular game updates (gravity)
+                for player_game, player_bus in zip(games, buses):
+                    spawned = player_game.pieces_spawned
+                    player_game.tick()
+                    if player_game.pieces_spawned != spawned:
+                        player_bus.piece_locked()
             
-            # Draw game
-            game.draw(screen)
-            pygame.display.flip()
-            clock.tick(60)
+            # Input that arrived during the tick in progress
+            apply_inputs(now)
+            
+            draw_start = time.perf_counter()
+            dirty = []
+            for player, (player_game, board) in enumerate(zip(games, boards)):
+                player_game.follow_piece()
+
+                # Draw game, pushing only the parts of the window that changed
+                # (rectangles come back relative to the player's slice)
+                dirty.extend(rect.move(player * SCREEN_WIDTH, 0) for rect in player_game.draw(board))
+            if preview is not None:
+                # The async worker builds its controller in the background
+                gesture_source = controller.controller if isinstance(controller, GestureWorker) else controller
+                dirty += preview.draw(screen, gesture_source)
+            pygame.display.update(dirty)
+            if metrics is not None:
+                metrics.record('update', draw_start - update_start)
+                metrics.record('draw', time.perf_counter() - draw_start)
+            if args.fps:
+                clock.tick(args.fps)
             
     finally:
-        controller.cleanup()
+        if controller:
+            controller.cleanup()
+        if bot is not None:
+            bot.close()
+        if recorder is not None:
+            recorder.close(game.ticks)
+        if args.latency_dump:
+            metrics.dump(args.latency_dump)
 
 if __name__ == "__main__":
     main() 
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# Headless load generator for tetris_server.py: opens one connection per
+# player, each creating a game and sending random inputs, plus spectator
+# connections watching several games each. Every client mirrors its games
+# from the delta stream; with --verify the mirrors are checked against
+# fresh snapshots once every input has been handled.
+import argparse
+import asyncio
+import random
+import time
+
+from tetris_engine import COMMANDS
+from tetris_net import (DEFAULT_HOST, DEFAULT_PORT, ERROR, GAMES, JOINED, SNAPSHOT, GameMirror,
+                        MessageReader, encode_create, encode_input, encode_list, encode_watch)
+
+# Seconds to wait for the replies that end a verify round
+VERIFY_TIMEOUT = 5.0
+
+
+class LoadClient(asyncio.Protocol):
+    """One load-test connection mirroring the games it plays or watches"""
+
+    def __init__(self):
+        self.reader = MessageReader()
+        self.mirror = GameMirror()
+        self.transport = None
+        self.joined = asyncio.Queue()
+        self.listed = asyncio.Queue()
+        # Snapshots received per game, to tell when a re-watch has been answered
+        self.snapshots = {}
+        self.bytes_received = 0
+        self.messages = 0
+        self.errors = []
+        # Snapshots compared against the mirror while verifying: (matched, total)
+        self.verifying = False
+        self.checked = [0, 0]
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.bytes_received += len(data)
+        for kind, fields in self.reader.feed(data):
+            self.messages += 1
+            if kind == JOINED:
+                self.joined.put_nowait(fields)
+            elif kind == GAMES:
+                self.listed.put_nowait(fields)
+            elif kind == ERROR:
+                self.errors.append(fields[0])
+            elif kind == SNAPSHOT:
+                game_id, _, state = fields
+                self.snapshots[game_id] = self.snapshots.get(game_id, 0) + 1
+                game = self.mirror.games.get(game_id)
+                if game is not None and self.verifying:
+                    self.checked[1] += 1
+                    self.checked[0] += mirror_matches(game, state)
+            self.mirror.apply(kind, fields)
+
+    def send(self, data):
+        self.transport.write(data)
+
+    async def sync(self):
+        """Wait until the server has handled everything sent so far (LIST is answered in order)"""
+        self.send(encode_list())
+        await asyncio.wait_for(self.listed.get(), VERIFY_TIMEOUT)
+
+    async def rewatch(self):
+        """Watch every mirrored game again and wait for the snapshots that answer it"""
+        answered = {game_id: self.snapshots.get(game_id, 0) + 1 for game_id in self.mirror.games}
+        for game_id in answered:
+            self.send(encode_watch(game_id))
+        deadline = time.monotonic() + VERIFY_TIMEOUT
+        while any(self.snapshots.get(game_id, 0) < count for game_id, count in answered.items()
+                  if game_id in self.mirror.games):
+            if time.monotonic() > deadline:
+                raise TimeoutError("No snapshot in reply to WATCH")
+            await asyncio.sleep(0.01)
+
+
+def mirror_matches(game, state):
+    """True when a mirrored game shows the same board, piece and score as a snapshot"""
+    return (b''.join(map(bytes, game.board)) == state.board and
+            (game.shape_id, game.rotation, game.current_color, game.piece_x, game.piece_y,
+             game.ghost_y, game.score, game.lines_cleared, game.game_over) ==
+            (state.shape_id, state.rotation, state.color, state.piece_x, state.piece_y,
+             state.ghost_y, state.score, state.lines_cleared, state.game_over))
+
+
+async def connect(host, port):
+    loop = asyncio.get_running_loop()
+    _, client = await loop.create_connection(LoadClient, host, port)
+    return client
+
+
+async def play(client, game_id, rate, deadline, rng):
+    """Send random inputs to a game at `rate` per second until the deadline"""
+    while True:
+        delay = rng.expovariate(rate)
+        if time.monotonic() + delay >= deadline:
+            return
+        await asyncio.sleep(delay)
+        game = client.mirror.games.get(game_id)
+        if game is not None and game.game_over:
+            client.send(encode_input(game_id, 'RESET'))
+        else:
+            client.send(encode_input(game_id, rng.choice(COMMANDS)))
+
+
+async def run_load(host=DEFAULT_HOST, port=DEFAULT_PORT, games=100, spectators=10, watch=5,
+                   rate=4.0, duration=10.0, seed=0, verify=False):
+    """Drive the server for `duration` seconds; return per-client traffic numbers"""
+    rng = random.Random(seed)
+    players = []
+    game_ids = []
+    for index in range(games):
+        client = await connect(host, port)
+        client.send(encode_create(seed + index))
+        game_id, _ = await asyncio.wait_for(client.joined.get(), 5)
+        players.append(client)
+        game_ids.append(game_id)
+    watchers = []
+    for index in range(spectators):
+        client = await connect(host, port)
+        for offset in range(min(watch, games)):
+            client.send(encode_watch(game_ids[(index * watch + offset) % games]))
+        watchers.append(client)
+
+    start = time.monotonic()
+    await asyncio.gather(*(play(client, game_id, rate, start + duration, random.Random(rng.random()))
+                           for client, game_id in zip(players, game_ids)))
+    elapsed = time.monotonic() - start
+
+    if verify:
+        # Every RESET has been handled once the players' LIST replies are in. Its
+        # snapshot can still be the one answering a WATCH (one snapshot serves
+        # every client waiting at a broadcast), so the first re-watch only flushes
+        # them and the snapshots answering the second are compared.
+        await asyncio.gather(*(client.sync() for client in players))
+        await asyncio.gather(*(client.rewatch() for client in watchers))
+        for client in watchers:
+            client.verifying = True
+        await asyncio.gather(*(client.rewatch() for client in watchers))
+
+    clients = players + watchers
+    result = {
+        'games': games,
+        'spectators': spectators,
+        'seconds': elapsed,
+        'player_bytes_per_second': sum(c.bytes_received for c in players) / len(players) / elapsed,
+        'spectator_bytes_per_second': (sum(c.bytes_received for c in watchers) / len(watchers) / elapsed
+                                       if watchers else 0),
+        'max_bytes_per_second': max(c.bytes_received for c in clients) / elapsed,
+        'messages': sum(c.messages for c in clients),
+        'errors': sum(len(c.errors) for c in clients),
+    }
+    if verify:
+        result['verified'] = sum(c.checked[0] for c in watchers)
+        result['verify_total'] = sum(c.checked[1] for c in watchers)
+    for client in clients:
+        client.transport.close()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load generator for the Tetris game server')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'server address (default {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'server port (default {DEFAULT_PORT})')
+    parser.add_argument('--games', type=int, default=100, help='player connections, one game each')
+    parser.add_argument('--spectators', type=int, default=10, help='spectator connections')
+    parser.add_argument('--watch', type=int, default=5, help='games each spectator watches')
+    parser.add_argument('--rate', type=float, default=4.0, help='inputs per second per player')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--seed', type=int, default=0, help='seed for game pieces and inputs')
+    parser.add_argument('--verify', action='store_true',
+                        help='check the spectators\' mirrored games against fresh snapshots at the end')
+    args = parser.parse_args(argv)
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+
+    result = asyncio.run(run_load(args.host, args.port, args.games, args.spectators, args.watch,
+                                  args.rate, args.duration, args.seed, args.verify))
+    print(f"{result['games']} games, {result['spectators']} spectators, {result['seconds']:.1f}s: "
+          f"{result['player_bytes_per_second']:.0f} B/s per player, "
+          f"{result['spectator_bytes_per_second']:.0f} B/s per spectator "
+          f"(max {result['max_bytes_per_second']:.0f} B/s), "
+          f"{result['messages']} messages, {result['errors']} errors")
+    if args.verify:
+        print(f"Mirrors matching snapshots: {result['verified']}/{result['verify_total']}")
+        if result['verified'] != result['verify_total']:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
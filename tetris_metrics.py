@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Rolling latency statistics for the game loop and the gesture pipeline.
+import csv
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class LatencyRecorder:
+    def __init__(self, window=600):
+        """Keep the last `window` samples (in seconds) for every stage"""
+        self.window = window
+        self.samples = {}
+        self.totals = {}
+        # Stages are recorded from both the game loop and the gesture worker
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        """Add one duration sample for a stage"""
+        with self._lock:
+            samples = self.samples.get(stage)
+            if samples is None:
+                samples = self.samples[stage] = deque(maxlen=self.window)
+                self.totals[stage] = 0
+            samples.append(seconds)
+            self.totals[stage] += 1
+
+    @contextmanager
+    def time(self, stage):
+        """Context manager that records how long its body took"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def percentiles(self, stage, quantiles=(50, 95, 99)):
+        """Return the requested percentiles of a stage in milliseconds, or None"""
+        with self._lock:
+            samples = sorted(self.samples.get(stage, ()))
+        if not samples:
+            return None
+        last = len(samples) - 1
+        return tuple(samples[min(last, int(round(q / 100 * last)))] * 1000 for q in quantiles)
+
+    def summary(self):
+        """Return {stage: {count, mean_ms, p50_ms, p95_ms, p99_ms}} for every stage"""
+        result = {}
+        with self._lock:
+            stages = list(self.samples)
+        for stage in stages:
+            with self._lock:
+                samples = list(self.samples[stage])
+                count = self.totals[stage]
+            p50, p95, p99 = self.percentiles(stage)
+            result[stage] = {
+                'count': count,
+                'mean_ms': sum(samples) / len(samples) * 1000,
+                'p50_ms': p50,
+                'p95_ms': p95,
+                'p99_ms': p99,
+            }
+        return result
+
+    def dump(self, path):
+        """Write the summary to a .json file, or CSV for any other extension"""
+        summary = self.summary()
+        if path.lower().endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump(summary, f, indent=2)
+            return
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'])
+            for stage, stats in summary.items():
+                writer.writerow([stage, stats['count']] +
+                                ['%.3f' % stats[key] for key in ('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms')])
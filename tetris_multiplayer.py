@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+# Multi-player gesture input: one board per hand in a shared camera, or one
+# board per camera. Cameras are read on their own threads, and one MediaPipe
+# run covers every player in a frame (or in a mosaic of several cameras), so
+# the vision cost grows much more slowly than the number of players.
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from tetris_fingertip import ZoneLayout, ZoneTracker
+from tetris_frame_source import open_frame_source
+
+# Landmark indices used to place a hand and read its pointer
+WRIST = 0
+INDEX_FINGERTIP = 8
+
+
+class CaptureThread:
+    """Reads one frame source on its own thread, keeping only the newest frame"""
+
+    def __init__(self, source, index):
+        self.source = source
+        # (capture_time, frame) of the newest successful read, or None
+        self.latest = None
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f'Capture{index}', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while self._running and not self.source.finished:
+            success, frame = self.source.read()
+            if not success:
+                # Camera read failed; back off instead of spinning
+                time.sleep(0.01)
+                continue
+            self.latest = (time.monotonic(), frame)
+
+    def stop(self):
+        """Stop reading and release the source"""
+        self._running = False
+        self._thread.join(timeout=2.0)
+        self.source.release()
+
+
+class MultiHandController:
+    """Gesture controller for several players, each with their own control grid.
+
+    With one frame source every player owns a vertical strip of the mirrored
+    image and all hands are found by a single model run. With one source
+    per player each camera is a player; cameras run their own model in a
+    thread pool, or with mosaic=True are stitched side by side and share
+    one model run. Hands belong to the strip their wrist is in.
+    Same polling interface as HandGestureController, except held_action is
+    a tuple with one entry per player.
+    """
+
+    # Zone canvas of each player, matching the single-player controller
+    WINDOW_WIDTH = 640
+    WINDOW_HEIGHT = 480
+    GRID_COLUMNS = 3
+    GRID_ROWS = 3
+    CONTROL_ZONES = {
+        'LEFT': (0, 1),
+        'RIGHT': (2, 1),
+        'ROTATE': (1, 0),
+        'DOWN': (1, 2),
+        'NEUTRAL': (1, 1)
+    }
+    PREVIEW_MODES = ('window', 'off')
+
+    def __init__(self, players, frame_sources, mosaic=False, inference_scale=1.0,
+                 metrics=None, preview='window', smoothing='one_euro', hysteresis=12,
+                 prediction_lead=0.08):
+        if players < 1:
+            raise ValueError("Need at least one player")
+        if len(frame_sources) not in (1, players):
+            raise ValueError("Use one frame source for all players or one per player")
+        if preview not in self.PREVIEW_MODES:
+            raise ValueError(f"Unknown preview mode: {preview}")
+        self.players = players
+        self.inference_scale = inference_scale
+        self.metrics = metrics
+        self.preview = preview
+
+        # Players of each model run: every player in one frame or mosaic, or one camera each
+        if len(frame_sources) == 1 or mosaic:
+            self.groups = [list(range(players))]
+        else:
+            self.groups = [[player] for player in range(players)]
+        self.mediapipe_hands = mp.solutions.hands
+        self.hand_drawer = mp.solutions.drawing_utils
+        # MediaPipe graphs are not thread-safe, so each group gets its own
+        self.hand_detectors = [self.mediapipe_hands.Hands(
+            static_image_mode=False,
+            max_num_hands=len(group),
+            min_detection_confidence=0.7,
+            min_tracking_confidence=0.5
+        ) for group in self.groups]
+        self.pool = ThreadPoolExecutor(max_workers=len(self.groups)) if len(self.groups) > 1 else None
+
+        layout = ZoneLayout.grid(self.GRID_COLUMNS, self.GRID_ROWS, self.CONTROL_ZONES,
+                                 self.WINDOW_WIDTH, self.WINDOW_HEIGHT)
+        self.zone_layout = layout
+        self.trackers = [ZoneTracker(layout, smoothing=smoothing, hysteresis=hysteresis,
+                                     prediction_lead=prediction_lead) for _ in range(players)]
+        self.held_action = (None,) * players
+
+        self.frame_sources = frame_sources
+        self.captures = [CaptureThread(source, index) for index, source in enumerate(frame_sources)]
+        # Capture time of the frame each source last contributed
+        self.used_times = [None] * len(frame_sources)
+        self.last_capture_time = None
+        self.model_runs = 0
+
+    def warm_up(self):
+        """Run every hand model once on a blank frame so the first real frame is not slow"""
+        blank_image = np.zeros((self.WINDOW_HEIGHT, self.WINDOW_WIDTH, 3), dtype=np.uint8)
+        for detector in self.hand_detectors:
+            detector.process(blank_image)
+
+    def _frames(self, group):
+        """Newest unused (capture_time, mirrored frame) per source of a group, or None if none is new"""
+        indices = [0] if len(self.captures) == 1 else group
+        latest = [self.captures[index].latest for index in indices]
+        if None in latest or all(item[0] == self.used_times[index]
+                                 for index, item in zip(indices, latest)):
+            return None
+        for index, item in zip(indices, latest):
+            self.used_times[index] = item[0]
+        return [(capture_time, cv2.flip(frame, 1)) for capture_time, frame in latest]
+
+    def _run_group(self, group_index, frames):
+        """Run one model over a group's frames; return (image, strip edges, landmarks per player)"""
+        group = self.groups[group_index]
+        images = [frame for _, frame in frames]
+        if len(images) == 1:
+            # One camera: equal vertical strips, left to right
+            image = images[0]
+            edges = [player / len(group) for player in range(len(group) + 1)]
+        else:
+            # Mosaic: every camera scaled to the first one's height, side by side
+            height = images[0].shape[0]
+            images = [image if image.shape[0] == height else
+                      cv2.resize(image, (image.shape[1] * height // image.shape[0], height))
+                      for image in images]
+            image = np.hstack(images)
+            widths = np.cumsum([0] + [part.shape[1] for part in images])
+            edges = list(widths / widths[-1])
+
+        model_image = image
+        if self.inference_scale != 1.0:
+            model_image = cv2.resize(image, None, fx=self.inference_scale, fy=self.inference_scale,
+                                     interpolation=cv2.INTER_AREA)
+        results = self.hand_detectors[group_index].process(cv2.cvtColor(model_image, cv2.COLOR_BGR2RGB))
+
+        hands = [None] * len(group)
+        for hand_landmarks in results.multi_hand_landmarks or []:
+            strip = bisect_right(edges, hand_landmarks.landmark[WRIST].x) - 1
+            if 0 <= strip < len(group) and hands[strip] is None:
+                hands[strip] = hand_landmarks
+        return image, edges, hands
+
+    def get_finger_position(self):
+        """Process the newest frames and return the action each player fires (tuple, None if idle)"""
+        inference_start = time.perf_counter()
+        jobs = []
+        for group_index, group in enumerate(self.groups):
+            frames = self._frames(group)
+            if frames is not None:
+                jobs.append((group_index, frames))
+        if not jobs:
+            return None
+        if self.pool is None:
+            outputs = [self._run_group(group_index, frames) for group_index, frames in jobs]
+        else:
+            outputs = list(self.pool.map(lambda job: self._run_group(*job), jobs))
+        self.model_runs += len(jobs)
+        inference_done = time.perf_counter()
+
+        fired = [None] * self.players
+        held = list(self.held_action)
+        capture_times = []
+        for (group_index, frames), (image, edges, hands) in zip(jobs, outputs):
+            group = self.groups[group_index]
+            # Zone timing follows the oldest capture in the group, like the single-player clock
+            current_time = min(capture_time for capture_time, _ in frames)
+            capture_times.append(current_time)
+            for strip, player in enumerate(group):
+                tracker = self.trackers[player]
+                hand_landmarks = hands[strip]
+                if hand_landmarks is None:
+                    tracker.lost()
+                else:
+                    # Fingertip in the strip's own coordinates, scaled to the zone canvas
+                    fingertip = hand_landmarks.landmark[INDEX_FINGERTIP]
+                    left, right = edges[strip], edges[strip + 1]
+                    _, _, fired[player] = tracker.update(
+                        (fingertip.x - left) / (right - left) * self.WINDOW_WIDTH,
+                        fingertip.y * self.WINDOW_HEIGHT, current_time)
+                held[player] = tracker.held_action
+            if self.preview == 'window':
+                self._show(group_index, image, edges, hands)
+        self.held_action = tuple(held)
+        self.last_capture_time = min(capture_times)
+
+        if self.metrics is not None:
+            self.metrics.record('inference', inference_done - inference_start)
+        return tuple(fired)
+
+    def poll(self):
+        """Process the newest frames and return (capture_time, held actions per player), or None"""
+        if self.get_finger_position() is None:
+            return None
+        return self.last_capture_time, self.held_action
+
+    def _show(self, group_index, image, edges, hands):
+        """Draw strip borders, hands and held actions into the group's OpenCV window"""
+        height, width = image.shape[:2]
+        for strip, player in enumerate(self.groups[group_index]):
+            x = int(edges[strip] * width)
+            if strip:
+                cv2.line(image, (x, 0), (x, height), (255, 255, 255), 2)
+            label = f"P{player + 1}: {self.trackers[player].held_action or '-'}"
+            cv2.putText(image, label, (x + 10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+            if hands[strip] is not None:
+                self.hand_drawer.draw_landmarks(image, hands[strip],
+                                                self.mediapipe_hands.HAND_CONNECTIONS)
+        cv2.imshow(f'Players {group_index + 1}', image)
+        cv2.waitKey(1)
+
+    def cleanup(self):
+        """Stop the capture threads, release the cameras and close windows"""
+        for capture in self.captures:
+            capture.stop()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+        cv2.destroyAllWindows()
+
+
+def open_multiplayer(players, sources, realtime=True, **kwargs):
+    """Build a MultiHandController from comma-separated source specs ("0" or "0,1,2")"""
+    specs = [spec.strip() for spec in str(sources).split(',')]
+    return MultiHandController(players, [open_frame_source(spec, realtime=realtime) for spec in specs],
+                               **kwargs)
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+# Wire protocol of the game server (tetris_server.py): binary message
+# encoders, a sans-I/O decoder and a mirror that keeps local copies of
+# remote games up to date from the delta stream.
+#
+# Every message is a 2 byte body length, a 1 byte type and the body (all
+# little-endian). A client watching a game gets one SNAPSHOT and then only
+# deltas: PIECE when the falling piece moved, LOCK with the locked piece
+# and the indices of the rows it cleared, OVER when the game ended. A
+# board is never sent again unless the client falls behind or the game
+# is reset.
+import struct
+
+from tetris_engine import BOARD_HEIGHT, BOARD_WIDTH, COMMANDS, GameState, Tetris
+from tetris_pieces import PIECES
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 7777
+
+# Client -> server message types
+CREATE, WATCH, INPUT, LEAVE, LIST = range(1, 6)
+# Server -> client message types
+JOINED, SNAPSHOT, PIECE, LOCK, OVER, CLOSED, GAMES, ERROR = range(16, 24)
+
+# Commands a player can send: the engine commands plus a game reset
+INPUT_COMMANDS = COMMANDS + ('RESET',)
+ROLES = ('player', 'spectator')
+
+# Longest message body; snapshots of boards up to MAX_HEIGHT rows fit
+MAX_BODY = 0xFFFF
+MAX_HEIGHT = 5000
+
+_COMMAND_CODES = {command: code for code, command in enumerate(INPUT_COMMANDS)}
+
+_HEADER = struct.Struct('<HB')
+_GAME = struct.Struct('<I')
+# has seed, seed, board height
+_CREATE = struct.Struct('<?QH')
+# game, command code
+_INPUT = struct.Struct('<IB')
+# game, role code
+_JOINED = struct.Struct('<IB')
+# game, height, then the GameState fields after board and column tops
+_SNAPSHOT = struct.Struct('<IHBBBbhhIHI?IQHQ')
+# game, shape, rotation, colour, x, y, ghost y
+_PIECE = struct.Struct('<IBBBbhh')
+# game, shape, rotation, colour, x, y, score, level, lines, cleared row count
+_LOCK = struct.Struct('<IBBBbhIHIB')
+
+
+def _message(kind, body=b''):
+    return _HEADER.pack(len(body), kind) + body
+
+
+def encode_create(seed=None, height=BOARD_HEIGHT):
+    """Ask for a new game; the sender becomes its player"""
+    return _message(CREATE, _CREATE.pack(seed is not None, seed or 0, height))
+
+
+def encode_watch(game_id):
+    """Watch a game; watching one again asks for a fresh snapshot"""
+    return _message(WATCH, _GAME.pack(game_id))
+
+
+def encode_input(game_id, command):
+    """Apply one of INPUT_COMMANDS to a game the sender plays"""
+    return _message(INPUT, _INPUT.pack(game_id, _COMMAND_CODES[command]))
+
+
+def encode_leave(game_id):
+    return _message(LEAVE, _GAME.pack(game_id))
+
+
+def encode_list():
+    return _message(LIST)
+
+
+def encode_joined(game_id, role):
+    return _message(JOINED, _JOINED.pack(game_id, ROLES.index(role)))
+
+
+def encode_snapshot(game_id, game):
+    """Full state of a game, enough to rebuild it with Tetris.restore"""
+    state = game.snapshot()
+    return _message(SNAPSHOT, _SNAPSHOT.pack(
+        game_id, game.height, state.shape_id, state.rotation, state.color, state.piece_x,
+        state.piece_y, state.ghost_y, state.score, state.level, state.lines_cleared,
+        state.game_over, state.pieces_spawned, state.rng_state, state.fall_time, state.ticks)
+        + struct.pack(f'<{BOARD_WIDTH}H', *state.column_tops) + state.board)
+
+
+def encode_piece(game_id, shape_id, rotation, color, x, y, ghost_y):
+    return _message(PIECE, _PIECE.pack(game_id, shape_id, rotation, color, x, y, ghost_y))
+
+
+def encode_lock(game_id, shape_id, rotation, color, x, y, score, level, lines, cleared):
+    """A piece locked at (x, y); cleared holds the board rows it completed, top to bottom"""
+    return _message(LOCK, _LOCK.pack(game_id, shape_id, rotation, color, x, y, score, level,
+                                     lines, len(cleared))
+                    + struct.pack(f'<{len(cleared)}H', *cleared))
+
+
+def encode_over(game_id):
+    return _message(OVER, _GAME.pack(game_id))
+
+
+def encode_closed(game_id):
+    return _message(CLOSED, _GAME.pack(game_id))
+
+
+def encode_games(game_ids):
+    return _message(GAMES, struct.pack(f'<H{len(game_ids)}I', len(game_ids), *game_ids))
+
+
+def encode_error(text):
+    return _message(ERROR, text.encode('utf-8')[:MAX_BODY])
+
+
+def decode(kind, body):
+    """Decode a message body into a tuple of fields; raise ValueError if it is malformed"""
+    try:
+        if kind in (WATCH, LEAVE, OVER, CLOSED):
+            return _GAME.unpack(body)
+        if kind == CREATE:
+            has_seed, seed, height = _CREATE.unpack(body)
+            return (seed if has_seed else None, height)
+        if kind == INPUT:
+            game_id, code = _INPUT.unpack(body)
+            return (game_id, INPUT_COMMANDS[code])
+        if kind == LIST:
+            return ()
+        if kind == JOINED:
+            game_id, role = _JOINED.unpack(body)
+            return (game_id, ROLES[role])
+        if kind == SNAPSHOT:
+            (game_id, height, shape_id, rotation, color, piece_x, piece_y, ghost_y, score,
+             level, lines, game_over, spawned, rng_state, fall_time,
+             ticks) = _SNAPSHOT.unpack_from(body)
+            tops_end = _SNAPSHOT.size + 2 * BOARD_WIDTH
+            column_tops = struct.unpack_from(f'<{BOARD_WIDTH}H', body, _SNAPSHOT.size)
+            board = body[tops_end:]
+            if len(board) != height * BOARD_WIDTH:
+                raise ValueError(f"Snapshot board has {len(board)} cells, expected {height * BOARD_WIDTH}")
+            return (game_id, height, GameState(board, column_tops, shape_id, rotation, color,
+                                               piece_x, piece_y, ghost_y, score, level, lines,
+                                               game_over, spawned, rng_state, fall_time, ticks))
+        if kind == PIECE:
+            return _PIECE.unpack(body)
+        if kind == LOCK:
+            fields = _LOCK.unpack_from(body)
+            cleared = struct.unpack_from(f'<{fields[-1]}H', body, _LOCK.size)
+            if len(body) != _LOCK.size + 2 * len(cleared):
+                raise ValueError("Trailing bytes after lock message")
+            return fields[:-1] + (cleared,)
+        if kind == GAMES:
+            (count,) = struct.unpack_from('<H', body)
+            return (struct.unpack(f'<{count}I', body[2:]),)
+        if kind == ERROR:
+            return (bytes(body).decode('utf-8', 'replace'),)
+    except (struct.error, IndexError) as exc:
+        raise ValueError(f"Malformed message of type {kind}: {exc}") from None
+    raise ValueError(f"Unknown message type {kind}")
+
+
+class MessageReader:
+    """Splits a byte stream into decoded (type, fields) messages"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Add received bytes; return the messages they completed"""
+        buffer = self.buffer
+        buffer += data
+        messages = []
+        start = 0
+        while len(buffer) - start >= _HEADER.size:
+            length, kind = _HEADER.unpack_from(buffer, start)
+            end = start + _HEADER.size + length
+            if end > len(buffer):
+                break
+            messages.append((kind, decode(kind, bytes(buffer[start + _HEADER.size:end]))))
+            start = end
+        del buffer[:start]
+        return messages
+
+
+class GameMirror:
+    """Local copies of remote games, kept in sync by applying server messages.
+
+    Games are created with factory(height=...) on their first snapshot, so
+    the pygame Tetris subclass can be used to draw them. Only the state
+    drawn on screen (board, falling piece, ghost, score, game over) is kept
+    up to date between snapshots.
+    """
+
+    def __init__(self, factory=Tetris):
+        self.factory = factory
+        self.games = {}
+
+    def apply(self, kind, fields):
+        """Apply one decoded message; return the id of the game it changed, or None"""
+        if kind == SNAPSHOT:
+            game_id, height, state = fields
+            game = self.games.get(game_id)
+            if game is None or game.height != height:
+                game = self.games[game_id] = self.factory(height=height)
+            game.restore(state)
+            return game_id
+        if kind not in (PIECE, LOCK, OVER, CLOSED):
+            return None
+        game_id = fields[0]
+        game = self.games.get(game_id)
+        if game is None:
+            return None
+        if kind == PIECE:
+            (_, game.shape_id, game.rotation, game.current_color, game.piece_x, game.piece_y,
+             game.ghost_y) = fields
+        elif kind == LOCK:
+            _, shape_id, rotation, color, x, y, score, level, lines, cleared = fields
+            self._lock(game, PIECES[shape_id][rotation], color, x, y, cleared)
+            game.score, game.level, game.lines_cleared = score, level, lines
+            game.pieces_spawned += 1
+        elif kind == OVER:
+            game.game_over = True
+        else:
+            del self.games[game_id]
+        return game_id
+
+    @staticmethod
+    def _lock(game, piece, color, x, y, cleared):
+        """Stamp a locked piece into the board and remove the rows it cleared"""
+        board = game.board
+        tops = game.column_tops
+        for dx, dy in piece.cells:
+            if 0 <= y + dy < game.height:
+                board[y + dy][x + dx] = color + 1
+                tops[x + dx] = min(tops[x + dx], y + dy)
+        # Top to bottom, so the rows still to be removed keep their index
+        for row in cleared:
+            del board[row]
+            board.insert(0, [0] * BOARD_WIDTH)
+        if cleared:
+            game.recompute_column_tops()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Tetromino definitions shared by the game, the batch simulator and tools.
+# Kept free of pygame / OpenCV imports so headless code can use it cheaply.
+from collections import namedtuple
+
+# Bright, distinct colors for tetris pieces
+PIECE_COLORS = [
+    (255, 50, 50),    # Bright Red
+    (50, 255, 50),    # Bright Green
+    (50, 50, 255),    # Bright Blue
+    (255, 255, 50),   # Bright Yellow
+    (255, 50, 255),   # Bright Magenta
+    (50, 255, 255),   # Bright Cyan
+]
+
+# Define tetromino shapes using 2D arrays
+TETROMINO_SHAPES = [
+    [[1, 1, 1, 1]],           # I piece
+    [[1, 1], [1, 1]],         # O piece
+    [[1, 1, 1], [0, 1, 0]],   # T piece
+    [[1, 1, 1], [1, 0, 0]],   # L piece
+    [[1, 1, 1], [0, 0, 1]],   # J piece
+    [[1, 1, 0], [0, 1, 1]],   # S piece
+    [[0, 1, 1], [1, 1, 0]]    # Z piece
+]
+
+
+# Every shape has four rotation states (some of them repeat, e.g. the O piece)
+NUM_ROTATIONS = 4
+
+# Immutable description of one rotation state of one shape:
+#   grid       - tuple-of-tuples 0/1 layout, top row first
+#   cells      - (x, y) offsets of the filled cells
+#   width      - number of columns in the grid
+#   height     - number of rows in the grid
+#   bottom     - per column, the row offset of its lowest filled cell
+#   row_masks  - per row, a bitmask with bit x set for each filled cell
+#   shifted_masks - per left shift s < MAX_SHIFT, row_masks shifted by s, so
+#                   padded bitboards test a column with one AND per row
+PieceDescriptor = namedtuple('PieceDescriptor', [
+    'shape_id', 'rotation', 'grid', 'cells', 'width', 'height', 'bottom', 'row_masks',
+    'shifted_masks'
+])
+
+# Shifts precomputed in shifted_masks; covers boards up to 23 columns plus wall padding
+MAX_SHIFT = 32
+
+
+def rotate_grid(grid):
+    """Rotate a piece grid 90 degrees clockwise"""
+    return tuple(tuple(row) for row in zip(*reversed(grid)))
+
+
+def _describe(shape_id, rotation, grid):
+    """Build the descriptor for one rotation state"""
+    cells = tuple((x, y) for y, row in enumerate(grid) for x, cell in enumerate(row) if cell)
+    width = len(grid[0])
+    bottom = tuple(max(y for x, y in cells if x == col) for col in range(width))
+    row_masks = tuple(sum(1 << x for x, cell in enumerate(row) if cell) for row in grid)
+    shifted_masks = tuple(tuple(mask << shift for mask in row_masks) for shift in range(MAX_SHIFT))
+    return PieceDescriptor(shape_id, rotation, grid, cells, width, len(grid), bottom, row_masks,
+                           shifted_masks)
+
+
+def _build_pieces():
+    """Precompute every rotation of every shape in TETROMINO_SHAPES"""
+    pieces = []
+    for shape_id, shape in enumerate(TETROMINO_SHAPES):
+        grid = tuple(tuple(row) for row in shape)
+        rotations = []
+        for rotation in range(NUM_ROTATIONS):
+            rotations.append(_describe(shape_id, rotation, grid))
+            grid = rotate_grid(grid)
+        pieces.append(tuple(rotations))
+    return tuple(pieces)
+
+
+# PIECES[shape_id][rotation] -> PieceDescriptor, built once at import
+PIECES = _build_pieces()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# Compact binary input recordings and headless re-simulation.
+# A replay is the game's seed plus every command with the tick it was
+# applied on, so a session can be reproduced exactly by the engine.
+#
+# File layout (little-endian):
+#   header  - MAGIC, 1 byte format version, 8 byte seed
+#   records - varint tick delta since the previous record, then one byte:
+#             low 4 bits command code, high 4 bits input source code
+# Ticks without input cost nothing, and records are only ever appended.
+import argparse
+import hashlib
+import time
+
+from tetris_engine import COMMANDS, Tetris
+
+MAGIC = b'TTRP'
+VERSION = 1
+
+# Command codes: the engine commands, a game reset and the end-of-session marker
+REPLAY_COMMANDS = COMMANDS + ('RESET',)
+END_CODE = 0x0F
+SOURCES = ('keyboard', 'gesture', 'ai', 'replay')
+
+# Bytes read from disk at a time when streaming a replay
+CHUNK_SIZE = 1 << 16
+
+_COMMAND_CODES = {command: code for code, command in enumerate(REPLAY_COMMANDS)}
+_SOURCE_CODES = {source: code for code, source in enumerate(SOURCES)}
+
+
+def _encode_varint(value):
+    """Encode a non-negative integer as LEB128 bytes"""
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+class ReplayRecorder:
+    def __init__(self, path, seed, flush_every=64):
+        """Start a recording of a game created with the given seed"""
+        self.path = path
+        self.last_tick = 0
+        self.records = 0
+        self.flush_every = flush_every
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + bytes([VERSION]) + seed.to_bytes(8, 'little'))
+
+    def record(self, tick, command, source='keyboard'):
+        """Append one command applied on `tick` (ticks must not go backwards)"""
+        self._write(tick, _COMMAND_CODES[command] | _SOURCE_CODES[source] << 4)
+
+    def _write(self, tick, code):
+        if tick < self.last_tick:
+            raise ValueError(f"Tick {tick} is before the previous record ({self.last_tick})")
+        self._file.write(_encode_varint(tick - self.last_tick) + bytes([code]))
+        self.last_tick = tick
+        self.records += 1
+        # Flush now and then so a crash loses at most a few moves
+        if self.records % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self, end_tick=None):
+        """Write the end-of-session marker and close the file"""
+        if self._file is None:
+            return
+        try:
+            if end_tick is not None:
+                self._write(end_tick, END_CODE)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class ReplayReader:
+    """Streams (tick, command, source) records from a replay file.
+
+    command is None for the end-of-session marker. A record cut short by
+    a crash while recording is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        header = self._file.read(len(MAGIC) + 9)
+        if len(header) < len(MAGIC) + 9 or not header.startswith(MAGIC):
+            self._file.close()
+            raise ValueError(f"Not a Tetris replay: {path}")
+        self.version = header[len(MAGIC)]
+        if self.version != VERSION:
+            self._file.close()
+            raise ValueError(f"Unsupported replay version {self.version}: {path}")
+        self.seed = int.from_bytes(header[len(MAGIC) + 1:], 'little')
+
+    def __iter__(self):
+        tick = 0
+        pending = b''
+        while True:
+            chunk = self._file.read(CHUNK_SIZE)
+            data = pending + chunk if pending else chunk
+            end = len(data)
+            pos = 0
+            while pos < end:
+                start = pos
+                delta = 0
+                shift = 0
+                while pos < end and data[pos] & 0x80:
+                    delta |= (data[pos] & 0x7F) << shift
+                    shift += 7
+                    pos += 1
+                if pos + 1 >= end:
+                    # Record continues in the next chunk
+                    pos = start
+                    break
+                tick += delta | data[pos] << shift
+                code = data[pos + 1]
+                pos += 2
+                if code == END_CODE:
+                    yield tick, None, None
+                else:
+                    yield tick, REPLAY_COMMANDS[code & 0x0F], SOURCES[code >> 4]
+            pending = data[pos:]
+            if not chunk:
+                return
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _apply(game, command):
+    """Apply one recorded command to the game"""
+    if command == 'RESET':
+        game.reset()
+    else:
+        game.apply_command(command)
+
+
+def fast_forward(path, use_bitboard=True):
+    """Re-simulate a replay as fast as possible and return the final game"""
+    with ReplayReader(path) as reader:
+        game = Tetris(use_bitboard=use_bitboard, seed=reader.seed)
+        for tick, command, _ in reader:
+            # Idle stretches between inputs are skipped gravity step by gravity step
+            game.tick(tick - game.ticks)
+            if command is not None:
+                _apply(game, command)
+    return game
+
+
+def replay_frames(path, use_bitboard=False):
+    """Re-simulate a replay one tick at a time, yielding the game after every frame"""
+    with ReplayReader(path) as reader:
+        game = Tetris(use_bitboard=use_bitboard, seed=reader.seed)
+        for tick, command, _ in reader:
+            while game.ticks < tick:
+                game.tick()
+                yield game
+            if command is not None:
+                _apply(game, command)
+
+
+def summary(game):
+    """State fingerprint of a game, for comparing a replay against expected results"""
+    state = game.snapshot()
+    return {
+        'ticks': game.ticks,
+        'score': game.score,
+        'level': game.level,
+        'lines': game.lines_cleared,
+        'pieces': game.pieces_spawned,
+        'game_over': game.game_over,
+        'board_sha1': hashlib.sha1(state.board).hexdigest(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-simulate a recorded Tetris session headlessly')
+    parser.add_argument('replay', help='replay file written with tetris_keyboard.py --record')
+    parser.add_argument('--frames', action='store_true', help='step frame by frame instead of fast-forwarding')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.frames:
+        game = None
+        for game in replay_frames(args.replay):
+            pass
+        if game is None:
+            game = fast_forward(args.replay)
+    else:
+        game = fast_forward(args.replay)
+    elapsed = time.perf_counter() - start
+    result = summary(game)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+    print(f"Simulated {game.ticks} ticks in {elapsed:.3f}s ({game.ticks / max(elapsed, 1e-9):,.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+# Asyncio game server: hosts many headless Tetris engines on one fixed
+# timestep, takes player input over TCP and streams compact deltas (see
+# tetris_net.py) to players and spectators.
+#
+# Per game, deltas are encoded once per broadcast and the same bytes are
+# written to every client. Piece moves are coalesced to the latest state
+# per broadcast, so bandwidth per client is bounded by the send rate. A
+# client whose socket buffer fills up stops receiving deltas and gets a
+# fresh snapshot once it has caught up, which bounds memory per client.
+import argparse
+import asyncio
+import itertools
+import time
+
+from tetris_engine import BOARD_HEIGHT, Tetris
+from tetris_metrics import LatencyRecorder
+from tetris_net import (CREATE, DEFAULT_HOST, DEFAULT_PORT, INPUT, LEAVE, LIST, MAX_HEIGHT,
+                        WATCH, MessageReader, encode_closed, encode_error, encode_games,
+                        encode_joined, encode_lock, encode_over, encode_piece, encode_snapshot)
+from tetris_timestep import TICK_RATE, FixedTimestep
+
+# Broadcasts per second; piece moves in between are coalesced
+SEND_RATE = 30
+# Bytes queued for a client before its deltas are dropped for a later snapshot
+MAX_BUFFER = 64 * 1024
+MAX_GAMES = 1000
+# Games one connection may play or watch at once
+MAX_GAMES_PER_CLIENT = 64
+
+
+class ServerGame(Tetris):
+    """Headless engine that keeps its piece locks for the next broadcast"""
+
+    def __init__(self, seed=None, height=BOARD_HEIGHT, tick_rate=TICK_RATE):
+        # (shape, rotation, colour, x, y, score, level, lines, cleared rows) per lock
+        self.locks = []
+        self._cleared = ()
+        super().__init__(seed=seed, height=height, tick_rate=tick_rate)
+
+    def lock_piece(self):
+        piece = (self.shape_id, self.rotation, self.current_color, self.piece_x, self.piece_y)
+        self._cleared = ()
+        super().lock_piece()
+        self.locks.append(piece + (self.score, self.level, self.lines_cleared, self._cleared))
+
+    def clear_lines(self, first_row=0, last_row=None):
+        # Note the full rows before the engine removes them
+        board = self.board
+        last_row = self.height if last_row is None else last_row
+        self._cleared = tuple(y for y in range(max(first_row, self.stack_top), last_row)
+                              if all(board[y]))
+        super().clear_lines(first_row, last_row)
+
+
+class GameSession:
+    """One hosted game, its players and the clients receiving its deltas"""
+
+    def __init__(self, game_id, seed=None, height=BOARD_HEIGHT, tick_rate=TICK_RATE):
+        self.game_id = game_id
+        self.game = ServerGame(seed=seed, height=height, tick_rate=tick_rate)
+        self.players = set()
+        # Clients that are up to date and get deltas
+        self.clients = set()
+        # Clients waiting for a snapshot: new watchers, resets and clients that fell behind
+        self.joining = set()
+        self.shown_piece = None
+        self.shown_over = False
+
+    def subscribers(self):
+        return self.clients | self.joining
+
+    def reset(self):
+        """Start the game over; everyone gets a snapshot at the next broadcast"""
+        self.game.reset()
+        self.game.locks.clear()
+        self.joining |= self.clients
+        self.clients.clear()
+
+    def deltas(self):
+        """Encoded changes since the last call: locks, the latest piece state and game over"""
+        game = self.game
+        game_id = self.game_id
+        out = [encode_lock(game_id, *lock) for lock in game.locks]
+        game.locks.clear()
+        piece = (game.shape_id, game.rotation, game.current_color, game.piece_x, game.piece_y,
+                 game.ghost_y)
+        if piece != self.shown_piece:
+            self.shown_piece = piece
+            out.append(encode_piece(game_id, *piece))
+        if game.game_over != self.shown_over:
+            self.shown_over = game.game_over
+            if game.game_over:
+                out.append(encode_over(game_id))
+        return b''.join(out)
+
+    def snapshot(self):
+        return encode_snapshot(self.game_id, self.game)
+
+
+class ClientConnection(asyncio.Protocol):
+    """One TCP client: decodes its requests and queues what the server sends it"""
+
+    def __init__(self, server):
+        self.server = server
+        self.reader = MessageReader()
+        self.transport = None
+        # game_id -> GameSession this client plays or watches
+        self.games = {}
+        # Sessions whose deltas were dropped while the socket buffer was full
+        self.stalled = set()
+        self.paused = False
+        self.bytes_sent = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        # pause_writing() fires above the high mark, resume_writing() once below the low one
+        transport.set_write_buffer_limits(high=self.server.max_buffer,
+                                          low=self.server.max_buffer // 4)
+        self.server.clients.add(self)
+
+    def connection_lost(self, exc):
+        self.server.clients.discard(self)
+        for session in list(self.games.values()):
+            self.server.unsubscribe(self, session)
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        # Caught up: send the games whose deltas were dropped from scratch
+        for session in self.stalled:
+            if session.game_id in self.games:
+                session.joining.add(self)
+        self.stalled.clear()
+
+    def send(self, data):
+        """Queue bytes for the client; False if its buffer is full and nothing was queued"""
+        if self.paused or self.transport.is_closing():
+            return False
+        self.transport.write(data)
+        self.bytes_sent += len(data)
+        return True
+
+    def data_received(self, data):
+        try:
+            messages = self.reader.feed(data)
+        except ValueError as exc:
+            self.send(encode_error(str(exc)))
+            self.transport.close()
+            return
+        for kind, fields in messages:
+            self.server.handle(self, kind, fields)
+
+
+class GameServer:
+    def __init__(self, tick_rate=TICK_RATE, send_rate=SEND_RATE, max_games=MAX_GAMES,
+                 max_buffer=MAX_BUFFER, metrics=None):
+        """Host up to max_games games, ticked tick_rate and broadcast send_rate times a second"""
+        self.tick_rate = tick_rate
+        self.send_interval = 1.0 / send_rate
+        self.max_games = max_games
+        self.max_buffer = max_buffer
+        self.metrics = metrics
+        self.sessions = {}
+        self.clients = set()
+        self._ids = itertools.count(1)
+        self.stepper = FixedTimestep(tick_rate=tick_rate)
+        self.ticks = 0
+
+    def handle(self, client, kind, fields):
+        """Act on one decoded client message"""
+        if kind == INPUT:
+            game_id, command = fields
+            session = client.games.get(game_id)
+            if session is None or client not in session.players:
+                client.send(encode_error(f"Not a player of game {game_id}"))
+            elif command == 'RESET':
+                session.reset()
+            else:
+                session.game.apply_command(command)
+        elif kind == CREATE:
+            seed, height = fields
+            if len(self.sessions) >= self.max_games:
+                client.send(encode_error("Server is full"))
+            elif not 4 <= height <= MAX_HEIGHT:
+                client.send(encode_error(f"Board height must be between 4 and {MAX_HEIGHT}"))
+            elif len(client.games) >= MAX_GAMES_PER_CLIENT:
+                client.send(encode_error(f"At most {MAX_GAMES_PER_CLIENT} games per client"))
+            else:
+                session = GameSession(next(self._ids), seed, height, self.tick_rate)
+                self.sessions[session.game_id] = session
+                session.players.add(client)
+                self.subscribe(client, session, 'player')
+        elif kind == WATCH:
+            (game_id,) = fields
+            session = self.sessions.get(game_id)
+            if session is None:
+                client.send(encode_error(f"No game {game_id}"))
+            elif game_id in client.games:
+                # Already watching: a fresh snapshot follows the next deltas
+                session.joining.add(client)
+            elif len(client.games) >= MAX_GAMES_PER_CLIENT:
+                client.send(encode_error(f"At most {MAX_GAMES_PER_CLIENT} games per client"))
+            else:
+                self.subscribe(client, session, 'spectator')
+        elif kind == LEAVE:
+            (game_id,) = fields
+            session = client.games.get(game_id)
+            if session is not None:
+                self.unsubscribe(client, session)
+        elif kind == LIST:
+            client.send(encode_games(sorted(self.sessions)))
+        else:
+            client.send(encode_error(f"Unexpected message type {kind}"))
+
+    def subscribe(self, client, session, role):
+        client.games[session.game_id] = session
+        session.joining.add(client)
+        client.send(encode_joined(session.game_id, role))
+
+    def unsubscribe(self, client, session):
+        """Remove a client from a game; a game without players is closed"""
+        client.games.pop(session.game_id, None)
+        client.stalled.discard(session)
+        session.clients.discard(client)
+        session.joining.discard(client)
+        session.players.discard(client)
+        if not session.players and session.game_id in self.sessions:
+            del self.sessions[session.game_id]
+            closed = encode_closed(session.game_id)
+            for other in session.subscribers():
+                other.games.pop(session.game_id, None)
+                other.stalled.discard(session)
+                other.send(closed)
+
+    def step(self):
+        """Advance every game by one tick"""
+        for session in self.sessions.values():
+            session.game.tick()
+        self.ticks += 1
+
+    def broadcast(self):
+        """Send each game's deltas to its clients, then snapshots to the clients waiting for one"""
+        for session in self.sessions.values():
+            data = session.deltas()
+            if data and session.clients:
+                behind = [client for client in session.clients if not client.send(data)]
+                for client in behind:
+                    # Too slow to keep up: drop its deltas until resume_writing()
+                    session.clients.discard(client)
+                    client.stalled.add(session)
+            if session.joining:
+                snapshot = session.snapshot()
+                for client in list(session.joining):
+                    if client.send(snapshot):
+                        session.joining.discard(client)
+                        session.clients.add(client)
+
+    async def run(self):
+        """Tick and broadcast forever"""
+        next_broadcast = time.monotonic()
+        while True:
+            now = time.monotonic()
+            start = time.perf_counter()
+            for _ in self.stepper.advance(now):
+                self.step()
+            if now >= next_broadcast:
+                self.broadcast()
+                next_broadcast = max(next_broadcast + self.send_interval, now)
+            if self.metrics is not None:
+                self.metrics.record('frame', time.perf_counter() - start)
+            # Sleep until the next tick is due
+            await asyncio.sleep(max(self.stepper.dt - self.stepper.accumulator
+                                    - (time.monotonic() - now), 0))
+
+    def stats(self):
+        """Return a dict of server counters"""
+        return {
+            'games': len(self.sessions),
+            'clients': len(self.clients),
+            'ticks': self.ticks,
+            'dropped_ticks': self.stepper.dropped_ticks,
+            'bytes_sent': sum(client.bytes_sent for client in self.clients),
+            'stalled_clients': sum(1 for client in self.clients if client.stalled),
+        }
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, stats_interval=0, **kwargs):
+    """Run a GameServer on host:port until cancelled"""
+    metrics = LatencyRecorder() if stats_interval else None
+    server = GameServer(metrics=metrics, **kwargs)
+    loop = asyncio.get_running_loop()
+    listener = await loop.create_server(lambda: ClientConnection(server), host, port)
+    print(f"Serving Tetris on {host}:{port}")
+    tasks = [asyncio.create_task(server.run())]
+    if stats_interval:
+        tasks.append(asyncio.create_task(_report(server, stats_interval)))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        listener.close()
+
+
+async def _report(server, interval):
+    """Print server counters and frame times every `interval` seconds"""
+    last_bytes = 0
+    while True:
+        await asyncio.sleep(interval)
+        stats = server.stats()
+        frame = server.metrics.percentiles('frame') or (0, 0, 0)
+        rate = max(stats['bytes_sent'] - last_bytes, 0) / interval
+        last_bytes = stats['bytes_sent']
+        print(f"{stats['games']} games, {stats['clients']} clients, "
+              f"frame p50/p95/p99 {frame[0]:.2f}/{frame[1]:.2f}/{frame[2]:.2f} ms, "
+              f"{rate / 1024:.1f} KiB/s sent, {stats['dropped_ticks']} dropped ticks, "
+              f"{stats['stalled_clients']} stalled clients")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tetris game server for remote players and spectators')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'address to listen on (default {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'TCP port (default {DEFAULT_PORT})')
+    parser.add_argument('--tick-rate', type=int, default=TICK_RATE,
+                        help=f'game ticks per second (default {TICK_RATE})')
+    parser.add_argument('--send-rate', type=int, default=SEND_RATE,
+                        help=f'delta broadcasts per second (default {SEND_RATE})')
+    parser.add_argument('--max-games', type=int, default=MAX_GAMES,
+                        help=f'most games hosted at once (default {MAX_GAMES})')
+    parser.add_argument('--max-buffer', type=int, default=MAX_BUFFER,
+                        help='bytes queued per client before it is resynchronised with a snapshot')
+    parser.add_argument('--stats-interval', type=float, default=0,
+                        help='print server statistics every this many seconds (0 = off)')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.stats_interval, tick_rate=args.tick_rate,
+                          send_rate=args.send_rate, max_games=args.max_games,
+                          max_buffer=args.max_buffer))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
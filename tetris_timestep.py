@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Fixed-timestep scheduler: game logic advances at a constant tick rate of
+# real (monotonic) time, however fast or slow frames are rendered.
+
+# Default simulation rate; gravity speeds are tuned in ticks at this rate
+TICK_RATE = 60
+# Longest stall (in seconds) that is caught up on; beyond this the game pauses
+MAX_CATCH_UP = 0.25
+
+
+class FixedTimestep:
+    def __init__(self, tick_rate=TICK_RATE, max_catch_up=MAX_CATCH_UP):
+        """Schedule `tick_rate` game ticks per second of real time"""
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_ticks = max(1, int(max_catch_up * tick_rate))
+        self.accumulator = 0.0
+        self.last_time = None
+        self.dropped_ticks = 0
+
+    def advance(self, now):
+        """Return the end times of the ticks due by `now` (time.monotonic()), oldest first"""
+        if self.last_time is None:
+            self.last_time = now
+            return []
+        self.accumulator += now - self.last_time
+        self.last_time = now
+        # The epsilon keeps float rounding from holding back a tick that is exactly due
+        due = int(self.accumulator * self.tick_rate + 1e-9)
+        if due > self.max_ticks:
+            # After a long stall skip the excess instead of fast-forwarding through it
+            self.dropped_ticks += due - self.max_ticks
+            self.accumulator -= (due - self.max_ticks) * self.dt
+            due = self.max_ticks
+        self.accumulator = max(0.0, self.accumulator - due * self.dt)
+        # The newest due tick ended `accumulator` seconds before now
+        last_end = now - self.accumulator
+        return [last_end - (due - 1 - i) * self.dt for i in range(due)]
+
+    @property
+    def alpha(self):
+        """Fraction of the tick in progress that has elapsed, for interpolating between ticks"""
+        return self.accumulator / self.dt